@@ -51,6 +51,10 @@ class AppConfig:
     # Feature flags for temporarily disabling analysis features
     enable_traffic_analysis: bool = False  # Temporarily disabled
     enable_weather_analysis: bool = False  # Temporarily disabled
+    # Key for the keyed hash used to anonymize rider names in saved data
+    anonymization_key: str = "kompass"
+    # Persist engineered rider features to storage for reuse across sessions
+    enable_feature_cache: bool = False
     
     def __post_init__(self):
         if self.supported_file_types is None:
@@ -174,6 +178,8 @@ class ConfigManager:
             # Feature flags - temporarily disabled by default
             enable_traffic_analysis=os.environ.get("ENABLE_TRAFFIC_ANALYSIS", "false").lower() == "true",
             enable_weather_analysis=os.environ.get("ENABLE_WEATHER_ANALYSIS", "false").lower() == "true",
+            anonymization_key=os.environ.get("KOMPASS_ANON_KEY", "kompass"),
+            enable_feature_cache=os.environ.get("ENABLE_FEATURE_CACHE", "false").lower() == "true",
         )
         
         logger.debug(f"App config loaded - Log level: {config.log_level}")
@@ -92,6 +92,9 @@ def log_function_entry(logger: logging.Logger, func_name: str, **kwargs):
         func_name: Name of the function being entered
         **kwargs: Function parameters to log
     """
+    # Skip all formatting when debug output would be discarded anyway
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
     if kwargs:
         params = ", ".join(f"{k}={v}" for k, v in kwargs.items())
         logger.debug(f"Entering {func_name}({params})")
@@ -108,6 +111,8 @@ def log_function_exit(logger: logging.Logger, func_name: str, result=None):
         func_name: Name of the function being exited
         result: Function return value (optional)
     """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
     if result is not None:
         logger.debug(f"Exiting {func_name}() -> {type(result).__name__}")
     else:
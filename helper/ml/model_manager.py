@@ -68,15 +68,18 @@ class ModelManager:
             if user_id != 'anonymous':
                 self._maybe_auto_train(user_id)
             
-            # Get predictions for each effort level
+            # Get predictions for each effort level, stamped with one shared timestamp
+            timestamp = datetime.now().isoformat()
             predictions = {}
             for effort_level in effort_levels:
-                prediction = self.predictor.predict_speed(rider_features, route_features, effort_level)
+                prediction = self.predictor.predict_speed(
+                    rider_features, route_features, effort_level, _timestamp=timestamp
+                )
                 predictions[effort_level] = prediction
             
             # Add overall metadata
             predictions['_metadata'] = {
-                'prediction_timestamp': datetime.now().isoformat(),
+                'prediction_timestamp': timestamp,
                 'rider_id': rider_data.get('user_id', 'anonymous'),
                 'route_name': route_data.get('filename', 'unknown'),
                 'model_info': self.predictor.get_model_info()
@@ -439,7 +442,7 @@ class ModelManager:
             training_results = self.trainer.train_models(training_data)
             
             # Reload predictor models
-            self.predictor._load_models()
+            self.predictor._load_models(reload=True)
             
             result = {
                 'status': 'training_completed',
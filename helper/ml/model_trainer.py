@@ -6,22 +6,74 @@ including data preparation, model selection, training, and validation.
 """
 
 import numpy as np
-import pandas as pd
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, List, Tuple, Optional, TYPE_CHECKING
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-import joblib
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
-from sklearn.preprocessing import StandardScaler
+import io
+import re
 import warnings
 
+# sklearn, joblib and pandas are imported where they are used so that
+# lightweight calls such as get_training_status don't pay their import cost
+if TYPE_CHECKING:
+    import pandas as pd
+
 from ..config.logging_config import get_logger, log_function_entry, log_function_exit
 from ..storage.storage_manager import get_storage_manager
 
 logger = get_logger(__name__)
 
+# Route analysis fields consumed when building training samples
+_ROUTE_ANALYSIS_KEYS = (
+    'distance_km',
+    'total_elevation_gain',
+    'avg_gradient_percent',
+    'max_gradient_percent',
+    'elevation_variability',
+    'zone_speed_predictions'
+)
+
+# Legacy per-activity training files: activity_{id}_training.json
+_ACTIVITY_FILE_RE = re.compile(r'^activity_(\d+)_training\.json$')
+
+# Activity training samples are kept together in one columnar file per user
+_TRAINING_SAMPLES_FILENAME = 'training_samples.parquet'
+
+_ACTIVITY_FEATURE_COLUMNS = (
+    'ftp',
+    'weight_kg',
+    'experience_years',
+    'recent_avg_power',
+    'training_hours_per_week',
+    'overall_fitness_score',
+    'distance_km',
+    'total_elevation_gain',
+    'avg_gradient_percent',
+    'moving_time_hours',
+    'average_speed_kmh'
+)
+
+_ACTIVITY_TARGET_COLUMNS = ('actual_speed_kmh', 'actual_time_hours')
+
+_ACTIVITY_METADATA_COLUMNS = ('activity_id', 'activity_name', 'start_date', 'source', 'created_at')
+
+# Numeric columns are real-world measurements with well under 7 significant digits
+_ACTIVITY_COLUMN_DTYPES = {
+    **{column: 'float32' for column in _ACTIVITY_FEATURE_COLUMNS + _ACTIVITY_TARGET_COLUMNS},
+    'activity_id': 'int64'
+}
+
+
+@dataclass(slots=True, frozen=True)
+class RiderFeatures:
+    """Fixed-schema rider features paired with every route training sample."""
+    ftp: float = 200
+    weight_kg: float = 70
+    experience_years: float = 1
+    recent_avg_power: float = 180
+    training_hours_per_week: float = 5
+    overall_fitness_score: float = 50
+
 
 class ModelTrainer:
     """Handles training of ML models for speed prediction."""
@@ -71,24 +123,33 @@ class ModelTrainer:
             rider_features = self._extract_rider_features_from_history(user_id, fitness_history)
             
             # Process route data for route features and actual performance (existing functionality)
+            batch_ts = datetime.now().isoformat()
+            route_samples = []
             for route_file in route_history[:50]:  # Limit to recent 50 routes for performance
                 try:
                     route_data = self.storage_manager.load_data(user_id, 'routes', route_file.get('filename'))
                     if route_data and 'analysis' in route_data:
                         # Extract features and actual performance
-                        sample = self._create_training_sample(rider_features, route_data)
+                        sample = self._create_training_sample(rider_features, self._slim_route_data(route_data), batch_ts)
                         if sample:
-                            training_data['features'].append(sample['features'])
-                            for effort_level, speed in sample['targets'].items():
-                                if effort_level not in training_data['targets']:
-                                    training_data['targets'][effort_level] = []
-                                training_data['targets'][effort_level].append(speed)
-                            training_data['metadata'].append(sample['metadata'])
+                            route_samples.append(sample)
                             
                 except Exception as e:
-                    logger.warning(f"Failed to process route {route_file}: {e}")
+                    logger.warning("Failed to process route %s: %s", route_file, e)
+            
+            # Estimate targets for routes without zone speed predictions in one pass
+            self._fill_synthetic_targets(route_samples)
+            
+            for sample in route_samples:
+                training_data['features'].append(sample['features'])
+                for effort_level, speed in sample['targets'].items():
+                    if effort_level not in training_data['targets']:
+                        training_data['targets'][effort_level] = []
+                    training_data['targets'][effort_level].append(speed)
+                training_data['metadata'].append(sample['metadata'])
             
             # Process activity-based training data (NEW FUNCTIONALITY)
+            activity_sample_count = 0
             for activity_file in activity_training_data:
                 try:
                     filename = activity_file.get('filename')
@@ -105,12 +166,24 @@ class ModelTrainer:
                                 training_data['targets'][target_type].append(value)
                             
                             training_data['metadata'].append(activity_sample.get('metadata', {}))
+                            activity_sample_count += 1
                             
                 except Exception as e:
-                    logger.warning(f"Failed to process activity training data {activity_file}: {e}")
+                    logger.warning("Failed to process activity training data %s: %s", activity_file, e)
+            
+            # Activity samples stored in the columnar training file
+            samples_df = self._load_training_samples_df(user_id)
+            if samples_df is not None and not samples_df.empty:
+                training_data['features'].extend(
+                    samples_df[list(_ACTIVITY_FEATURE_COLUMNS)].to_numpy(dtype=np.float32).tolist()
+                )
+                for target_type in _ACTIVITY_TARGET_COLUMNS:
+                    training_data['targets'].setdefault(target_type, []).extend(samples_df[target_type].tolist())
+                training_data['metadata'].extend(samples_df[list(_ACTIVITY_METADATA_COLUMNS)].to_dict('records'))
+                activity_sample_count += len(samples_df)
             
             logger.info(f"Collected {len(training_data['features'])} training samples "
-                       f"({len(route_history)} from routes, {len(activity_training_data)} from activities)")
+                       f"({len(route_history)} from routes, {activity_sample_count} from activities)")
             
         except Exception as e:
             logger.error(f"Error collecting training data: {e}")
@@ -143,7 +216,14 @@ class ModelTrainer:
             return results
         
         try:
-            X = np.array(training_data['features'])
+            # Column-major float32 layout: scaler and tree splitters scan per feature
+            X = np.asfortranarray(training_data['features'], dtype=np.float32)
+            
+            # Split once so every effort level is trained and evaluated on the same rows
+            rng = np.random.RandomState(42)
+            indices = rng.permutation(len(X))
+            test_size = int(np.ceil(0.2 * len(X)))
+            test_idx, train_idx = indices[:test_size], indices[test_size:]
             
             # Train models for each effort level
             for effort_level, targets in training_data['targets'].items():
@@ -151,10 +231,14 @@ class ModelTrainer:
                     logger.warning(f"Insufficient data for {effort_level} - skipping")
                     continue
                 
+                if len(targets) != len(X):
+                    logger.warning(f"Target count for {effort_level} does not match feature count - skipping")
+                    continue
+                
                 logger.info(f"Training model for {effort_level}")
                 
-                y = np.array(targets)
-                model_result = self._train_single_model(X, y, effort_level)
+                y = np.asarray(targets, dtype=np.float32)
+                model_result = self._train_single_model(X, y, effort_level, train_idx, test_idx)
                 
                 if model_result['success']:
                     self.models[effort_level] = model_result['model']
@@ -175,16 +259,9 @@ class ModelTrainer:
         log_function_exit(logger, "train_models")
         return results
     
-    def _extract_rider_features_from_history(self, user_id: str, fitness_history: List[str]) -> Dict[str, Any]:
+    def _extract_rider_features_from_history(self, user_id: str, fitness_history: List[str]) -> RiderFeatures:
         """Extract rider features from fitness data history."""
-        features = {
-            'ftp': 200,
-            'weight_kg': 70,
-            'experience_years': 1,
-            'recent_avg_power': 180,
-            'training_hours_per_week': 5,
-            'overall_fitness_score': 50
-        }
+        features = {}
         
         try:
             # Load most recent fitness data
@@ -216,10 +293,25 @@ class ModelTrainer:
         except Exception as e:
             logger.warning(f"Error extracting rider features: {e}")
         
-        return features
+        return RiderFeatures(**features)
     
-    def _create_training_sample(self, rider_features: Dict[str, Any], route_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Create a training sample from rider and route data."""
+    def _slim_route_data(self, route_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Reduce a stored route to the analysis fields used for training."""
+        analysis = route_data.get('analysis', {})
+        
+        slim_analysis = {key: analysis[key] for key in _ROUTE_ANALYSIS_KEYS if key in analysis}
+        power_requirement = analysis.get('power_analysis', {}).get('estimated_power_requirement')
+        if power_requirement is not None:
+            slim_analysis['power_analysis'] = {'estimated_power_requirement': power_requirement}
+        
+        return {
+            'filename': route_data.get('filename', 'unknown'),
+            'analysis': slim_analysis
+        }
+    
+    def _create_training_sample(self, rider_features: RiderFeatures, route_data: Dict[str, Any],
+                                batch_ts: str) -> Optional[Dict[str, Any]]:
+        """Create a training sample from rider and route data, stamped with the batch timestamp."""
         try:
             analysis = route_data.get('analysis', {})
             
@@ -240,12 +332,12 @@ class ModelTrainer:
             # Combine features
             combined_features = []
             combined_features.extend([
-                rider_features['ftp'],
-                rider_features['weight_kg'],
-                rider_features['experience_years'],
-                rider_features['recent_avg_power'],
-                rider_features['training_hours_per_week'],
-                rider_features['overall_fitness_score']
+                rider_features.ftp,
+                rider_features.weight_kg,
+                rider_features.experience_years,
+                rider_features.recent_avg_power,
+                rider_features.training_hours_per_week,
+                rider_features.overall_fitness_score
             ])
             combined_features.extend([
                 route_features['distance_km'],
@@ -268,16 +360,8 @@ class ModelTrainer:
                         effort_level = 'zone2' if 'zone_2' in zone.lower() else 'threshold'
                         targets[effort_level] = speed_data['speed_kmh']
             
-            # If no zone speeds available, estimate from distance and elevation
-            if not targets:
-                base_speed = 35.0  # km/h
-                gradient_factor = max(0.6, 1.0 - route_features['avg_gradient_percent'] / 100 * 1.5)
-                estimated_speed = base_speed * gradient_factor
-                targets = {
-                    'zone2': estimated_speed * 0.85,
-                    'threshold': estimated_speed * 1.0
-                }
-            
+            # If no zone speeds are available, targets are left empty and
+            # estimated in bulk by _fill_synthetic_targets
             return {
                 'features': combined_features,
                 'targets': targets,
@@ -285,43 +369,88 @@ class ModelTrainer:
                     'route_id': route_data.get('filename', 'unknown'),
                     'distance_km': route_features['distance_km'],
                     'elevation_gain': route_features['total_elevation_gain'],
-                    'timestamp': datetime.now().isoformat()
+                    'avg_gradient_percent': route_features['avg_gradient_percent'],
+                    'timestamp': batch_ts
                 }
             }
             
         except Exception as e:
-            logger.warning(f"Error creating training sample: {e}")
+            logger.warning("Error creating training sample: %s", e)
             return None
     
-    def _train_single_model(self, X: np.ndarray, y: np.ndarray, effort_level: str) -> Dict[str, Any]:
-        """Train a single model for a specific effort level."""
+    def _fill_synthetic_targets(self, samples: List[Dict[str, Any]]):
+        """Estimate zone2/threshold targets from gradient for samples without zone speeds."""
+        pending = [sample for sample in samples if not sample['targets']]
+        if not pending:
+            return
+        
+        base_speed = 35.0  # km/h
+        gradients = np.array([sample['metadata']['avg_gradient_percent'] for sample in pending], dtype=np.float64)
+        gradient_factor = np.maximum(0.6, 1.0 - gradients / 100 * 1.5)
+        threshold_speeds = base_speed * gradient_factor
+        zone2_speeds = threshold_speeds * 0.85
+        
+        for sample, zone2, threshold in zip(pending, zone2_speeds.tolist(), threshold_speeds.tolist()):
+            sample['targets'] = {
+                'zone2': zone2,
+                'threshold': threshold
+            }
+    
+    def _train_single_model(self, X: np.ndarray, y: np.ndarray, effort_level: str,
+                            train_idx: np.ndarray, test_idx: np.ndarray) -> Dict[str, Any]:
+        """Train a single model for a specific effort level using shared split indices."""
+        from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
+        from sklearn.linear_model import LinearRegression
+        from sklearn.model_selection import KFold
+        from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
+        from sklearn.preprocessing import StandardScaler
+        
         result = {'success': False}
         
         try:
             # Split data
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+            X_train, X_test = np.asfortranarray(X[train_idx]), X[test_idx]
+            y_train, y_test = y[train_idx], y[test_idx]
             
-            # Scale features
-            scaler = StandardScaler()
-            X_train_scaled = scaler.fit_transform(X_train)
-            X_test_scaled = scaler.transform(X_test)
+            # Tree ensembles are invariant to per-feature scaling, so only the
+            # linear candidate gets a fitted scaler
+            scaler = None
             
-            # Try different models and select the best
+            # Try different models and select the best, cheapest to fit first so
+            # later candidates can be abandoned as soon as they cannot catch up
             models_to_try = {
-                'random_forest': RandomForestRegressor(n_estimators=50, random_state=42, n_jobs=-1),
-                'gradient_boosting': GradientBoostingRegressor(n_estimators=50, random_state=42),
-                'linear': LinearRegression()
+                'linear': LinearRegression(),
+                'gradient_boosting': HistGradientBoostingRegressor(
+                    max_iter=100, max_depth=6, learning_rate=0.1,
+                    l2_regularization=0.1, random_state=42
+                ),
+                'random_forest': RandomForestRegressor(
+                    n_estimators=50, random_state=42, n_jobs=-1,
+                    max_features='sqrt', max_samples=0.8, max_depth=12
+                )
             }
             
+            folds = list(KFold(n_splits=min(5, len(X_train)//2)).split(X_train))
+            
             best_model = None
             best_score = -np.inf
             best_model_name = None
             
             for model_name, model in models_to_try.items():
                 try:
+                    scale_needed = model_name == 'linear'
+                    if scale_needed:
+                        scaler = StandardScaler()
+                        X_train_scaled = scaler.fit_transform(X_train)
+                        X_fit = X_train_scaled
+                    else:
+                        X_fit = X_train
+                    
                     # Cross-validation
-                    cv_scores = cross_val_score(model, X_train_scaled, y_train, cv=min(5, len(X_train)//2), scoring='r2')
-                    avg_score = np.mean(cv_scores)
+                    avg_score = self._race_cv_score(model, X_fit, y_train, folds, best_score)
+                    if avg_score is None:
+                        logger.debug("Model %s cannot beat %s - stopped cross-validation early", model_name, best_model_name)
+                        continue
                     
                     if avg_score > best_score:
                         best_score = avg_score
@@ -334,17 +463,21 @@ class ModelTrainer:
             if best_model is None:
                 raise Exception("No models could be trained successfully")
             
-            # Train the best model on full training set
-            best_model.fit(X_train_scaled, y_train)
-            
-            # Evaluate on test set
-            y_pred = best_model.predict(X_test_scaled)
+            # Train the best model on full training set and evaluate on test set
+            if best_model_name == 'linear':
+                best_model.fit(X_train_scaled, y_train)
+                y_pred = best_model.predict(scaler.transform(X_test))
+            else:
+                scaler = None
+                best_model.fit(X_train, y_train)
+                y_pred = best_model.predict(X_test)
             
+            # Cast to Python floats so float32 results stay JSON serializable
             metrics = {
-                'r2_score': r2_score(y_test, y_pred),
-                'mse': mean_squared_error(y_test, y_pred),
-                'mae': mean_absolute_error(y_test, y_pred),
-                'cv_score': best_score,
+                'r2_score': float(r2_score(y_test, y_pred)),
+                'mse': float(mean_squared_error(y_test, y_pred)),
+                'mae': float(mean_absolute_error(y_test, y_pred)),
+                'cv_score': float(best_score),
                 'model_type': best_model_name,
                 'training_samples': len(X_train),
                 'test_samples': len(X_test)
@@ -365,22 +498,62 @@ class ModelTrainer:
         
         return result
     
-    def _save_model(self, effort_level: str, model: Any, scaler: Any):
-        """Save trained model and scaler to storage."""
+    def _race_cv_score(self, model: Any, X: np.ndarray, y: np.ndarray,
+                       folds: List[Tuple[np.ndarray, np.ndarray]], best_score: float) -> Optional[float]:
+        """
+        Cross-validate a candidate model, stopping once it cannot beat best_score.
+        
+        R² is at most 1.0, so after k of n folds the best achievable mean is
+        (sum of scores + (n - k)) / n.
+        
+        Returns:
+            Mean R² across folds, or None if the candidate was abandoned early
+        """
+        from sklearn.base import clone
+        
+        n_folds = len(folds)
+        score_sum = 0.0
+        
+        for fold_number, (fit_idx, val_idx) in enumerate(folds, start=1):
+            fold_model = clone(model)
+            fold_model.fit(X[fit_idx], y[fit_idx])
+            score_sum += fold_model.score(X[val_idx], y[val_idx])
+            
+            if (score_sum + (n_folds - fold_number)) / n_folds < best_score:
+                return None
+        
+        return score_sum / n_folds
+    
+    def _save_model(self, effort_level: str, model: Any, scaler: Optional[Any]):
+        """Save trained model and scaler (if any) to storage."""
         try:
             # Save model
             model_filename = f"speed_model_{effort_level}.joblib"
-            self.storage_manager.save_data(model, None, 'models', model_filename)
+            self.storage_manager.save_data(self._dump_model_bytes(model), None, 'models', model_filename)
+            
+            # Tree models are trained on raw features and have no scaler
+            if scaler is None:
+                logger.info(f"Saved model for {effort_level} (no scaler)")
+                return
             
             # Save scaler
             scaler_filename = f"scaler_{effort_level}.joblib"
-            self.storage_manager.save_data(scaler, None, 'models', scaler_filename)
+            self.storage_manager.save_data(self._dump_model_bytes(scaler), None, 'models', scaler_filename)
             
             logger.info(f"Saved model and scaler for {effort_level}")
             
         except Exception as e:
             logger.error(f"Error saving model for {effort_level}: {e}")
     
+    def _dump_model_bytes(self, obj: Any) -> bytes:
+        """Serialize an estimator to compressed joblib bytes for storage."""
+        import joblib
+        
+        buffer = io.BytesIO()
+        # protocol 5 pickles NumPy arrays out-of-band without extra copies
+        joblib.dump(obj, buffer, compress=3, protocol=5)
+        return buffer.getvalue()
+    
     def _save_training_metadata(self, training_results: Dict[str, Any]):
         """Save training metadata."""
         try:
@@ -449,6 +622,10 @@ class ModelTrainer:
             # Get list of already processed activity IDs to avoid duplicates
             processed_activities = self._get_processed_activity_ids(user_id)
             
+            # Converted samples are written together in a single storage round-trip
+            pending_samples = []
+            batch_ts = datetime.now().isoformat()
+            
             # Process each activity
             for activity in cycling_activities:
                 activity_id = activity.get('id')
@@ -458,25 +635,17 @@ class ModelTrainer:
                 # Skip if already processed
                 if str(activity_id) in processed_activities:
                     results['skipped_duplicates'] += 1
-                    logger.debug(f"Skipping already processed activity {activity_id}")
+                    logger.debug("Skipping already processed activity %s", activity_id)
                     continue
                 
                 try:
                     # Convert activity to training data
                     training_sample = self._convert_activity_to_training_data(
-                        activity, access_token, oauth_client, rider_features
+                        activity, access_token, oauth_client, rider_features, batch_ts
                     )
                     
                     if training_sample:
-                        # Store training sample
-                        success = self._store_training_sample(user_id, activity_id, training_sample)
-                        if success:
-                            results['processed'] += 1
-                            results['activity_ids'].append(activity_id)
-                            logger.info(f"Added activity {activity_id} to training data")
-                        else:
-                            results['errors'] += 1
-                            results['error_messages'].append(f"Failed to store activity {activity_id}")
+                        pending_samples.append(training_sample)
                     else:
                         results['errors'] += 1
                         results['error_messages'].append(f"Failed to convert activity {activity_id}")
@@ -487,6 +656,19 @@ class ModelTrainer:
                     results['error_messages'].append(error_msg)
                     logger.warning(error_msg)
             
+            # Store all converted samples at once
+            if pending_samples:
+                pending_ids = [sample['metadata']['activity_id'] for sample in pending_samples]
+                if self._store_training_samples(user_id, pending_samples):
+                    results['processed'] += len(pending_samples)
+                    results['activity_ids'].extend(pending_ids)
+                    logger.info(f"Added {len(pending_samples)} activities to training data")
+                else:
+                    results['errors'] += len(pending_samples)
+                    results['error_messages'].extend(
+                        f"Failed to store activity {activity_id}" for activity_id in pending_ids
+                    )
+            
             logger.info(f"Training data collection completed: {results['processed']} processed, "
                        f"{results['skipped_duplicates']} skipped, {results['errors']} errors")
                        
@@ -500,36 +682,41 @@ class ModelTrainer:
     def _get_processed_activity_ids(self, user_id: str) -> set:
         """Get set of already processed activity IDs for a user."""
         try:
-            # Load training data metadata
-            metadata_files = self.storage_manager.list_user_data(user_id, 'training_data')
             processed_ids = set()
             
-            for file_info in metadata_files:
-                filename = file_info.get('filename', '')
-                if filename.startswith('activity_') and filename.endswith('.json'):
-                    # Extract activity ID from filename: activity_{id}_training.json
-                    try:
-                        activity_id = filename.replace('activity_', '').replace('_training.json', '')
-                        processed_ids.add(activity_id)
-                    except:
-                        pass
+            # Activities stored in the columnar training file
+            samples_df = self._load_training_samples_df(user_id)
+            if samples_df is not None:
+                processed_ids.update(samples_df['activity_id'].astype(str))
+            
+            # Legacy per-activity JSON files
+            metadata_files = self.storage_manager.list_user_data(user_id, 'training_data', prefix='activity_')
+            processed_ids.update(
+                match.group(1) for file_info in metadata_files
+                if (match := _ACTIVITY_FILE_RE.match(file_info.get('filename', '')))
+            )
             
-            logger.debug(f"Found {len(processed_ids)} already processed activities for user {user_id}")
+            logger.debug("Found %d already processed activities for user %s", len(processed_ids), user_id)
             return processed_ids
             
         except Exception as e:
             logger.warning(f"Error getting processed activity IDs: {e}")
             return set()
     
-    def _convert_activity_to_training_data(self, activity: Dict, access_token: str, oauth_client, rider_features: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def _convert_activity_to_training_data(self, activity: Dict, access_token: str, oauth_client,
+                                           rider_features: Dict[str, Any], batch_ts: str) -> Optional[Dict[str, Any]]:
         """
         Convert a single Strava activity to training data format.
         
+        Works entirely from the summary activity returned by the list endpoint;
+        no per-activity API calls are made.
+        
         Args:
             activity: Strava activity data
-            access_token: Strava access token
-            oauth_client: OAuth client for API calls
+            access_token: Strava access token (unused, kept for detail fetches)
+            oauth_client: OAuth client for API calls (unused, kept for detail fetches)
             rider_features: Rider fitness features
+            batch_ts: ISO timestamp shared by all samples in this ingestion run
             
         Returns:
             Training data sample or None if conversion failed
@@ -545,7 +732,7 @@ class ModelTrainer:
             
             # Skip activities that are too short or lack basic data
             if distance_m < 5000 or moving_time_s < 300:  # Less than 5km or 5 minutes
-                logger.debug(f"Skipping short activity {activity_id}: {distance_m}m, {moving_time_s}s")
+                logger.debug("Skipping short activity %s: %sm, %ss", activity_id, distance_m, moving_time_s)
                 return None
             
             # Convert to standard units
@@ -594,42 +781,80 @@ class ModelTrainer:
                     'route_features': route_features,
                     'rider_features': rider_features,
                     'source': 'strava_activity',
-                    'created_at': datetime.now().isoformat()
+                    'created_at': batch_ts
                 }
             }
             
-            logger.debug(f"Converted activity {activity_id} to training sample: {distance_km:.1f}km, {average_speed_kmh:.1f}km/h")
+            logger.debug("Converted activity %s to training sample: %.1fkm, %.1fkm/h", activity_id, distance_km, average_speed_kmh)
             return training_sample
             
         except Exception as e:
             logger.error(f"Error converting activity {activity.get('id', 'unknown')} to training data: {e}")
             return None
     
-    def _store_training_sample(self, user_id: str, activity_id: int, training_sample: Dict[str, Any]) -> bool:
+    def _load_training_samples_df(self, user_id: str) -> Optional["pd.DataFrame"]:
         """
-        Store a training sample for a user.
+        Load the user's columnar activity training samples.
         
         Args:
             user_id: User identifier
-            activity_id: Strava activity ID
-            training_sample: Training data sample
+            
+        Returns:
+            DataFrame with one row per activity, or None if nothing is stored yet
+        """
+        import pandas as pd
+        
+        try:
+            data = self.storage_manager.load_data(user_id, 'training_data', _TRAINING_SAMPLES_FILENAME)
+            if not isinstance(data, bytes):
+                return None
+            return pd.read_parquet(io.BytesIO(data))
+            
+        except Exception as e:
+            logger.warning(f"Error loading training samples for user {user_id}: {e}")
+            return None
+    
+    def _store_training_samples(self, user_id: str, training_samples: List[Dict[str, Any]]) -> bool:
+        """
+        Upsert training samples into the user's columnar training file.
+        
+        Args:
+            user_id: User identifier
+            training_samples: Training data samples from _convert_activity_to_training_data
             
         Returns:
             Success boolean
         """
+        import pandas as pd
+        
         try:
-            filename = f"activity_{activity_id}_training.json"
-            success = self.storage_manager.save_data(training_sample, user_id, 'training_data', filename)
+            rows = []
+            for sample in training_samples:
+                metadata = sample['metadata']
+                row = dict(zip(_ACTIVITY_FEATURE_COLUMNS, sample['features']))
+                row.update({column: sample['targets'][column] for column in _ACTIVITY_TARGET_COLUMNS})
+                row.update({column: metadata.get(column) for column in _ACTIVITY_METADATA_COLUMNS})
+                rows.append(row)
+            
+            new_df = pd.DataFrame(rows)
+            existing_df = self._load_training_samples_df(user_id)
+            if existing_df is not None:
+                new_df = pd.concat([existing_df, new_df], ignore_index=True)
+            new_df = new_df.drop_duplicates(subset='activity_id', keep='last').astype(_ACTIVITY_COLUMN_DTYPES)
+            
+            buffer = io.BytesIO()
+            new_df.to_parquet(buffer, index=False, compression='zstd')
+            success = self.storage_manager.save_data(buffer.getvalue(), user_id, 'training_data', _TRAINING_SAMPLES_FILENAME)
             
             if success:
-                logger.debug(f"Stored training sample for activity {activity_id}")
+                logger.debug("Stored %d training samples (%d total) for user %s", len(rows), len(new_df), user_id)
             else:
-                logger.error(f"Failed to store training sample for activity {activity_id}")
+                logger.error(f"Failed to store training samples for user {user_id}")
                 
             return success
             
         except Exception as e:
-            logger.error(f"Error storing training sample for activity {activity_id}: {e}")
+            logger.error(f"Error storing training samples for user {user_id}: {e}")
             return False
 
     def get_training_data_stats(self, user_id: str) -> Dict[str, Any]:
@@ -659,12 +884,14 @@ class ModelTrainer:
             
             # Count activity-based samples
             activity_training_data = self.storage_manager.list_user_data(user_id, 'training_data')
-            activity_samples = []
+            activity_files = []
             
             for file_info in activity_training_data:
                 filename = file_info.get('filename', '')
-                if filename.startswith('activity_') and filename.endswith('_training.json'):
-                    activity_samples.append(file_info)
+                if filename == _TRAINING_SAMPLES_FILENAME:
+                    activity_files.append(file_info)
+                elif filename.startswith('activity_') and filename.endswith('_training.json'):
+                    activity_files.append(file_info)
                     # Extract activity ID from filename
                     try:
                         activity_id = filename.replace('activity_', '').replace('_training.json', '')
@@ -672,13 +899,18 @@ class ModelTrainer:
                     except:
                         pass
             
-            stats['activity_samples'] = len(activity_samples)
+            # Activities stored in the columnar training file
+            samples_df = self._load_training_samples_df(user_id)
+            if samples_df is not None:
+                stats['activity_ids'].extend(samples_df['activity_id'].astype(str))
+            
+            stats['activity_samples'] = len(stats['activity_ids'])
             stats['total_samples'] = stats['route_samples'] + stats['activity_samples']
             
             # Get last updated timestamp
-            if activity_samples:
+            if activity_files:
                 # Sort by last modified and get the most recent
-                sorted_samples = sorted(activity_samples, 
+                sorted_samples = sorted(activity_files, 
                                        key=lambda x: x.get('last_modified', ''), 
                                        reverse=True)
                 if sorted_samples:
@@ -739,6 +971,20 @@ class ModelTrainer:
             ]
             
             if not individual_files:
+                # Samples in the columnar training file are already consolidated
+                samples_df = self._load_training_samples_df(user_id)
+                if samples_df is not None and not samples_df.empty:
+                    samples_file = next(
+                        (f for f in activity_training_files if f.get('filename') == _TRAINING_SAMPLES_FILENAME), {}
+                    )
+                    result.update({
+                        'success': True,
+                        'consolidated_samples': len(samples_df),
+                        'total_size_mb': samples_file.get('size_mb', 0),
+                        'filename': _TRAINING_SAMPLES_FILENAME
+                    })
+                    return result
+                
                 logger.info(f"No individual training files found for user {user_id}")
                 result['error'] = "No individual training files to consolidate"
                 return result
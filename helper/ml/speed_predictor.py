@@ -9,7 +9,10 @@ and route characteristics.
 import numpy as np
 import pandas as pd
 from typing import Dict, Any, Optional, List, Tuple
+from dataclasses import dataclass
 from datetime import datetime
+import functools
+import io
 import joblib
 import os
 
@@ -18,6 +21,152 @@ from ..storage.storage_manager import get_storage_manager
 
 logger = get_logger(__name__)
 
+# Model inputs in training column order, with defaults for missing values
+_RIDER_FEATURE_DEFAULTS = (
+    ('ftp', 200),
+    ('weight_kg', 70),
+    ('experience_years', 1),
+    ('recent_avg_power', 180),
+    ('training_hours_per_week', 5),
+    ('overall_fitness_score', 50),
+)
+_ROUTE_FEATURE_DEFAULTS = (
+    ('distance_km', 50),
+    ('total_elevation_gain', 500),
+    ('avg_gradient_percent', 2),
+    ('max_gradient_percent', 8),
+    ('elevation_variability', 100),
+    ('estimated_power_requirement', 220),
+)
+
+# Reasonable bounds (km/h) applied to model predictions
+_MODEL_SPEED_BOUNDS_KMH = (15.0, 60.0)
+
+# Base speeds (km/h) for the rule-based fallback at ~75% FTP (zone 2) and 100% FTP
+_RULE_BASE_SPEEDS = {'zone2': 32.0, 'threshold': 40.0}
+
+
+@functools.lru_cache(maxsize=1)
+def _load_all_speed_models() -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Load trained models and their metadata from storage.
+    
+    Cached so that deserialization happens once per process rather than once per
+    SpeedPredictor; call ``cache_clear()`` after saving new models.
+    
+    Returns:
+        Tuple of (models keyed by effort level, model metadata)
+    """
+    log_function_entry(logger, "_load_all_speed_models")
+    
+    storage_manager = get_storage_manager()
+    models = {}
+    model_metadata = {}
+    
+    try:
+        # Try to load existing models
+        # For models, user_id should be None (global data)
+        try:
+            model_files = storage_manager.list_user_data(None, 'models')
+        except Exception:
+            # Fallback to checking local directory directly
+            import os
+            models_dir = os.path.join(storage_manager.local_data_dir, 'models')
+            if os.path.exists(models_dir):
+                model_files = [f for f in os.listdir(models_dir) if f.endswith('.joblib')]
+            else:
+                model_files = []
+        
+        for model_file in model_files:
+            if isinstance(model_file, str) and model_file.endswith('.joblib'):
+                filename = model_file
+            elif isinstance(model_file, dict):
+                filename = model_file.get('filename', '')
+            else:
+                continue
+            
+            if filename.endswith('.joblib') and 'speed_model_' in filename:
+                effort_level = filename.replace('.joblib', '').replace('speed_model_', '')
+                
+                try:
+                    model = _load_speed_model(storage_manager, filename)
+                    if model is not None:
+                        models[effort_level] = model
+                        logger.info(f"Loaded model for effort level: {effort_level}")
+                except Exception as e:
+                    logger.warning(f"Failed to load model {filename}: {e}")
+        
+        # Load model metadata if available
+        try:
+            metadata = storage_manager.load_data(None, 'models', 'model_metadata.json')
+            if metadata:
+                model_metadata = metadata
+                logger.info("Loaded model metadata")
+        except Exception as e:
+            logger.warning(f"No model metadata found: {e}")
+            
+        if not models:
+            logger.warning("No trained models found - predictions will use fallback calculations")
+            
+    except Exception as e:
+        logger.error(f"Error loading models: {e}")
+        
+    log_function_exit(logger, "_load_all_speed_models")
+    return models, model_metadata
+
+
+def _load_speed_model(storage_manager, filename: str) -> Optional[Any]:
+    """Load a joblib-serialized model from storage."""
+    filepath = storage_manager._get_local_filepath(None, 'models', filename)
+    if not storage_manager.is_s3_enabled() and os.path.exists(filepath):
+        # Stream straight from disk rather than holding the whole file in memory
+        # alongside the unpickled estimator
+        model = joblib.load(filepath)
+    else:
+        model_bytes = storage_manager.load_data(None, 'models', filename)
+        if not isinstance(model_bytes, bytes):
+            logger.warning(f"Model file {filename} is not a serialized model - skipping")
+            return None
+        
+        model = joblib.load(io.BytesIO(model_bytes))
+    
+    # Inference runs one row at a time, so a worker pool only adds dispatch
+    # overhead to every predict call
+    if getattr(model, 'n_jobs', None) not in (None, 1):
+        model.n_jobs = 1
+    
+    return model
+
+
+@dataclass(slots=True)
+class SpeedPrediction:
+    """A single speed prediction, converted to a plain dict at the public API boundary."""
+    speed_kmh: float
+    confidence: float
+    method: str
+    factors: Optional[Dict[str, float]] = None
+    effort_level: str = ''
+    prediction_timestamp: str = ''
+    model_used: bool = False
+    feature_count: int = 0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the prediction as the dict shape returned by predict_speed."""
+        result = {
+            'speed_kmh': self.speed_kmh,
+            'confidence': self.confidence,
+            'method': self.method
+        }
+        if self.factors is not None:
+            result['factors'] = self.factors
+        result.update({
+            'effort_level': self.effort_level,
+            'prediction_timestamp': self.prediction_timestamp,
+            'model_used': self.model_used,
+            'feature_count': self.feature_count
+        })
+        return result
+
 
 class SpeedPredictor:
     """Handles ML-based speed prediction for rider-route combinations."""
@@ -29,66 +178,41 @@ class SpeedPredictor:
         self.storage_manager = get_storage_manager()
         self.models = {}
         self.model_metadata = {}
+        self._confidence = {}
         self._load_models()
         
         log_function_exit(logger, "__init__")
     
-    def _load_models(self):
-        """Load trained models from storage."""
-        log_function_entry(logger, "_load_models")
+    def _load_models(self, reload: bool = False):
+        """
+        Load trained models from storage.
         
-        try:
-            # Try to load existing models
-            # For models, user_id should be None (global data)
+        Args:
+            reload: Re-read models from storage instead of using the process cache
+        """
+        if reload:
+            _load_all_speed_models.cache_clear()
+        self.models, self.model_metadata = _load_all_speed_models()
+        
+        # Resolve each model's confidence once rather than on every prediction
+        self._confidence = {
+            effort_level: self._resolve_confidence(model, effort_level)
+            for effort_level, model in self.models.items()
+        }
+    
+    def _resolve_confidence(self, model: Any, effort_level: str) -> float:
+        """Determine the confidence reported for predictions from a model."""
+        confidence = 0.8  # Default confidence
+        if hasattr(model, 'predict_proba'):
             try:
-                model_files = self.storage_manager.list_user_data(None, 'models')
+                # For regression, we'll estimate confidence based on training performance
+                confidence = self.model_metadata.get(effort_level, {}).get('confidence', 0.8)
             except Exception:
-                # Fallback to checking local directory directly
-                import os
-                models_dir = os.path.join(self.storage_manager.local_data_dir, 'models')
-                if os.path.exists(models_dir):
-                    model_files = [f for f in os.listdir(models_dir) if f.endswith('.joblib')]
-                else:
-                    model_files = []
-            
-            for model_file in model_files:
-                if isinstance(model_file, str) and model_file.endswith('.joblib'):
-                    filename = model_file
-                elif isinstance(model_file, dict):
-                    filename = model_file.get('filename', '')
-                else:
-                    continue
-                
-                if filename.endswith('.joblib') and 'speed_model_' in filename:
-                    effort_level = filename.replace('.joblib', '').replace('speed_model_', '')
-                    
-                    try:
-                        model_data = self.storage_manager.load_data(None, 'models', filename)
-                        if model_data:
-                            self.models[effort_level] = model_data
-                            logger.info(f"Loaded model for effort level: {effort_level}")
-                    except Exception as e:
-                        logger.warning(f"Failed to load model {filename}: {e}")
-            
-            # Load model metadata if available
-            try:
-                metadata = self.storage_manager.load_data(None, 'models', 'model_metadata.json')
-                if metadata:
-                    self.model_metadata = metadata
-                    logger.info("Loaded model metadata")
-            except Exception as e:
-                logger.warning(f"No model metadata found: {e}")
-                
-            if not self.models:
-                logger.warning("No trained models found - predictions will use fallback calculations")
-                
-        except Exception as e:
-            logger.error(f"Error loading models: {e}")
-            
-        log_function_exit(logger, "_load_models")
+                pass
+        return confidence
     
     def predict_speed(self, rider_features: Dict[str, Any], route_features: Dict[str, Any], 
-                     effort_level: str = "zone2") -> Dict[str, Any]:
+                     effort_level: str = "zone2", _timestamp: Optional[str] = None) -> Dict[str, Any]:
         """
         Predict speed for a given rider-route combination.
         
@@ -96,33 +220,125 @@ class SpeedPredictor:
             rider_features: Dictionary of rider characteristics and fitness metrics
             route_features: Dictionary of route characteristics (distance, elevation, etc.)
             effort_level: Target effort level ("zone2", "threshold", "max")
+            _timestamp: Prediction timestamp shared across a batch of calls;
+                defaults to the current time
             
         Returns:
             Dictionary containing speed prediction and confidence metrics
         """
-        log_function_entry(logger, "predict_speed")
+        feature_vector = None
+        if effort_level in self.models:
+            feature_vector = self._try_prepare_feature_vector(rider_features, route_features)
+        if _timestamp is None:
+            _timestamp = datetime.now().isoformat()
+        prediction = self._predict_effort(
+            rider_features, route_features, effort_level, feature_vector, _timestamp
+        )
         
-        try:
-            # Prepare feature vector
-            feature_vector = self._prepare_feature_vector(rider_features, route_features)
+        return prediction
+    
+    def predict_multiple_efforts(self, rider_features: Dict[str, Any], route_features: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Predict speeds for multiple effort levels.
+        
+        The feature vector and timestamp are built once and shared by every
+        effort level, so each effort costs a single model.predict call. The
+        vector is skipped entirely when every effort level uses the rules.
+        
+        Args:
+            rider_features: Dictionary of rider characteristics
+            route_features: Dictionary of route characteristics
             
+        Returns:
+            Dictionary mapping effort levels to prediction results
+        """
+        log_function_entry(logger, "predict_multiple_efforts")
+        
+        effort_levels = ["zone2", "threshold"]
+        feature_vector = None
+        if any(effort_level in self.models for effort_level in effort_levels):
+            feature_vector = self._try_prepare_feature_vector(rider_features, route_features)
+        timestamp = datetime.now().isoformat()
+        
+        predictions = {
+            effort_level: self._predict_effort(rider_features, route_features, effort_level, feature_vector, timestamp)
+            for effort_level in effort_levels
+        }
+        
+        log_function_exit(logger, "predict_multiple_efforts")
+        return predictions
+    
+    def predict_speed_batch(self, rider_features: Dict[str, Any], routes_df: pd.DataFrame,
+                            effort_level: str = "zone2") -> List[float]:
+        """
+        Predict speeds for one rider over many routes.
+        
+        Builds the whole (N, 12) feature matrix at once and makes a single
+        model.predict call, instead of one predict_speed call per route.
+        
+        Args:
+            rider_features: Dictionary of rider characteristics and fitness metrics
+            routes_df: One row per route, with columns named like the route features
+            effort_level: Target effort level ("zone2", "threshold", "max")
+            
+        Returns:
+            Predicted speeds in km/h, in the same order as the rows of routes_df
+        """
+        log_function_entry(logger, "predict_speed_batch")
+        
+        if effort_level in self.models:
+            try:
+                X = self._prepare_feature_matrix(rider_features, routes_df)
+                speeds = np.clip(self.models[effort_level].predict(X), *_MODEL_SPEED_BOUNDS_KMH)
+                log_function_exit(logger, "predict_speed_batch")
+                return speeds.tolist()
+            except Exception as e:
+                logger.error(f"Batch ML prediction failed, using rule-based fallback: {e}")
+        
+        # Missing values are dropped so the rules fall back to their defaults
+        speeds = [
+            self._predict_with_rules(
+                rider_features, {k: v for k, v in route.items() if pd.notna(v)}, effort_level
+            ).speed_kmh
+            for route in routes_df.to_dict('records')
+        ]
+        
+        log_function_exit(logger, "predict_speed_batch")
+        return speeds
+    
+    def _try_prepare_feature_vector(self, rider_features: Dict[str, Any],
+                                    route_features: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Prepare the feature vector, returning None if the inputs are unusable."""
+        try:
+            return self._prepare_feature_vector(rider_features, route_features)
+        except Exception as e:
+            logger.error(f"Error preparing feature vector: {e}")
+            return None
+    
+    def _predict_effort(self, rider_features: Dict[str, Any], route_features: Dict[str, Any],
+                        effort_level: str, feature_vector: Optional[np.ndarray], timestamp: str) -> Dict[str, Any]:
+        """Predict a single effort level, using the feature vector only when a model exists."""
+        try:
             # Check if we have a trained model for this effort level
             if effort_level in self.models:
+                if feature_vector is None:
+                    raise ValueError("Feature vector could not be prepared")
                 # Use ML model prediction
                 prediction = self._predict_with_model(feature_vector, effort_level)
+                feature_count = feature_vector.shape[1]
             else:
                 # Fall back to rule-based prediction
                 prediction = self._predict_with_rules(rider_features, route_features, effort_level)
+                feature_count = len(rider_features) + len(route_features)
             
             # Add metadata
-            prediction.update({
-                'effort_level': effort_level,
-                'prediction_timestamp': datetime.now().isoformat(),
-                'model_used': effort_level in self.models,
-                'feature_count': len(feature_vector) if isinstance(feature_vector, dict) else feature_vector.shape[0] if hasattr(feature_vector, 'shape') else 0
-            })
+            prediction.effort_level = effort_level
+            prediction.prediction_timestamp = timestamp
+            prediction.model_used = effort_level in self.models
+            prediction.feature_count = feature_count
             
-            logger.info(f"Speed prediction completed for {effort_level}: {prediction.get('speed_kmh', 0):.1f} km/h")
+            logger.info("Speed prediction completed for %s: %.1f km/h", effort_level, prediction.speed_kmh)
+            return prediction.to_dict()
             
         except Exception as e:
             logger.error(f"Error in speed prediction: {e}")
@@ -131,90 +347,68 @@ class SpeedPredictor:
                 'confidence': 0.1,
                 'error': str(e),
                 'effort_level': effort_level,
-                'prediction_timestamp': datetime.now().isoformat(),
+                'prediction_timestamp': timestamp,
                 'model_used': False
             }
-        
-        log_function_exit(logger, "predict_speed")
-        return prediction
+            return prediction
     
-    def predict_multiple_efforts(self, rider_features: Dict[str, Any], route_features: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    def _prepare_feature_vector(self, rider_features: Dict[str, Any], route_features: Dict[str, Any]) -> np.ndarray:
         """
-        Predict speeds for multiple effort levels.
+        Prepare feature vector for ML model.
         
-        Args:
-            rider_features: Dictionary of rider characteristics
-            route_features: Dictionary of route characteristics
-            
-        Returns:
-            Dictionary mapping effort levels to prediction results
+        A new array is allocated per call because the predictor is shared
+        across threads and Streamlit sessions.
         """
-        log_function_entry(logger, "predict_multiple_efforts")
+        # float32 matches the dtype models are trained on
+        buf = np.empty((1, len(_RIDER_FEATURE_DEFAULTS) + len(_ROUTE_FEATURE_DEFAULTS)), dtype=np.float32)
+        i = 0
+        for key, default in _RIDER_FEATURE_DEFAULTS:
+            buf[0, i] = rider_features.get(key, default)
+            i += 1
+        for key, default in _ROUTE_FEATURE_DEFAULTS:
+            buf[0, i] = route_features.get(key, default)
+            i += 1
         
-        effort_levels = ["zone2", "threshold"]
-        predictions = {}
+        return buf
+    
+    def _prepare_feature_matrix(self, rider_features: Dict[str, Any], routes_df: pd.DataFrame) -> np.ndarray:
+        """Prepare an (N, 12) feature matrix for one rider and N routes."""
+        X = np.empty(
+            (len(routes_df), len(_RIDER_FEATURE_DEFAULTS) + len(_ROUTE_FEATURE_DEFAULTS)), dtype=np.float32
+        )
         
-        for effort_level in effort_levels:
-            predictions[effort_level] = self.predict_speed(rider_features, route_features, effort_level)
+        # Rider features are the same for every row
+        i = 0
+        for key, default in _RIDER_FEATURE_DEFAULTS:
+            X[:, i] = rider_features.get(key, default)
+            i += 1
         
-        log_function_exit(logger, "predict_multiple_efforts")
-        return predictions
-    
-    def _prepare_feature_vector(self, rider_features: Dict[str, Any], route_features: Dict[str, Any]) -> np.ndarray:
-        """Prepare feature vector for ML model."""
-        features = []
-        
-        # Rider features
-        features.extend([
-            rider_features.get('ftp', 200),
-            rider_features.get('weight_kg', 70),
-            rider_features.get('experience_years', 1),
-            rider_features.get('recent_avg_power', 180),
-            rider_features.get('training_hours_per_week', 5),
-            rider_features.get('overall_fitness_score', 50)
-        ])
-        
-        # Route features
-        features.extend([
-            route_features.get('distance_km', 50),
-            route_features.get('total_elevation_gain', 500),
-            route_features.get('avg_gradient_percent', 2),
-            route_features.get('max_gradient_percent', 8),
-            route_features.get('elevation_variability', 100),
-            route_features.get('estimated_power_requirement', 220)
-        ])
-        
-        return np.array(features).reshape(1, -1)
+        # Route features come column by column from the frame
+        for key, default in _ROUTE_FEATURE_DEFAULTS:
+            if key in routes_df.columns:
+                X[:, i] = routes_df[key].fillna(default).to_numpy(dtype=np.float32)
+            else:
+                X[:, i] = default
+            i += 1
+        
+        return X
     
-    def _predict_with_model(self, feature_vector: np.ndarray, effort_level: str) -> Dict[str, Any]:
+    def _predict_with_model(self, feature_vector: np.ndarray, effort_level: str) -> SpeedPrediction:
         """Use trained ML model for prediction."""
         try:
             model = self.models[effort_level]
-            speed_prediction = model.predict(feature_vector)[0]
+            speed_prediction = float(np.clip(model.predict(feature_vector), *_MODEL_SPEED_BOUNDS_KMH)[0])
             
-            # Get prediction confidence if model supports it
-            confidence = 0.8  # Default confidence
-            if hasattr(model, 'predict_proba'):
-                try:
-                    # For regression, we'll estimate confidence based on training performance
-                    confidence = self.model_metadata.get(effort_level, {}).get('confidence', 0.8)
-                except:
-                    pass
-            
-            return {
-                'speed_kmh': max(15.0, min(60.0, float(speed_prediction))),  # Reasonable bounds
-                'confidence': confidence,
-                'method': 'ml_model'
-            }
+            return SpeedPrediction(speed_prediction, self._confidence[effort_level], 'ml_model')
             
         except Exception as e:
             logger.error(f"ML model prediction failed: {e}")
             raise
     
     def _predict_with_rules(self, rider_features: Dict[str, Any], route_features: Dict[str, Any], 
-                           effort_level: str) -> Dict[str, Any]:
+                           effort_level: str) -> SpeedPrediction:
         """Fallback rule-based speed prediction."""
-        logger.info(f"Using rule-based prediction for {effort_level}")
+        logger.debug("Using rule-based prediction for %s", effort_level)
         
         # Get rider FTP and weight
         ftp = rider_features.get('ftp', 200)
@@ -225,19 +419,10 @@ class SpeedPredictor:
         
         # Route characteristics
         distance_km = route_features.get('distance_km', 50)
-        elevation_gain = route_features.get('total_elevation_gain', 500)
         avg_gradient = route_features.get('avg_gradient_percent', 2)
         
-        # Base speed calculation based on effort level
-        if effort_level == "zone2":
-            target_power = ftp * 0.75  # Zone 2 = ~75% FTP
-            base_speed = 32.0  # Base speed for zone 2
-        elif effort_level == "threshold":
-            target_power = ftp * 1.0   # Threshold = 100% FTP
-            base_speed = 40.0  # Base speed for threshold
-        else:
-            target_power = ftp * 0.85  # Default to tempo
-            base_speed = 36.0
+        # Base speed for the effort level, defaulting to tempo
+        base_speed = _RULE_BASE_SPEEDS.get(effort_level, 36.0)
         
         # Adjust for route difficulty
         gradient_factor = max(0.5, 1.0 - (avg_gradient / 100) * 2)  # Reduce speed for climbing
@@ -249,16 +434,16 @@ class SpeedPredictor:
         # Apply reasonable bounds
         predicted_speed = max(15.0, min(55.0, predicted_speed))
         
-        return {
-            'speed_kmh': predicted_speed,
-            'confidence': 0.6,  # Lower confidence for rule-based
-            'method': 'rule_based',
-            'factors': {
+        return SpeedPrediction(
+            speed_kmh=predicted_speed,
+            confidence=0.6,  # Lower confidence for rule-based
+            method='rule_based',
+            factors={
                 'gradient_factor': gradient_factor,
                 'distance_factor': distance_factor,
                 'power_to_weight': power_to_weight
             }
-        }
+        )
     
     def get_model_info(self) -> Dict[str, Any]:
         """Get information about loaded models."""
@@ -5,7 +5,7 @@ This module coordinates all rider data operations by using the specialized
 components for fetching, analysis, validation, and feature engineering.
 """
 
-import streamlit as st
+from concurrent.futures import Future
 from typing import Dict, Any, Optional
 from datetime import datetime
 
@@ -35,11 +35,14 @@ class RiderDataProcessor:
         self.data_manager = RiderDataManager()
         self.feature_engineer = FeatureEngineer()
     
-    @st.cache_data(ttl=3600)  # Cache for 1 hour
-    def fetch_comprehensive_rider_data(_self, access_token: str) -> Dict[str, Any]:
+    def fetch_comprehensive_rider_data(self, access_token: str) -> Dict[str, Any]:
         """
         Fetch and process comprehensive rider data.
         
+        Not cached itself: the raw Strava fetch is already cached by
+        RiderDataFetcher, and caching here as well would hold a second,
+        larger copy of the data.
+        
         Args:
             access_token: Valid Strava access token
             
@@ -51,36 +54,19 @@ class RiderDataProcessor:
         try:
             # 1. Fetch raw data
             logger.info("Fetching raw rider data from Strava")
-            raw_data = _self.data_fetcher.fetch_comprehensive_rider_data(access_token)
-            
-            # 2. Calculate fitness metrics
-            logger.info("Calculating fitness metrics")
-            raw_data["fitness_metrics"] = _self.fitness_analyzer.calculate_fitness_metrics(
-                raw_data.get("recent_activities", []), 
-                raw_data.get("zones")
-            )
-            
-            # 3. Analyze power metrics
-            logger.info("Analyzing power metrics")
-            raw_data["power_analysis"] = _self.fitness_analyzer.analyze_power_metrics(
-                raw_data.get("stats"), 
-                raw_data.get("recent_activities", [])
-            )
+            raw_data = self.data_fetcher.fetch_comprehensive_rider_data(access_token)
             
-            # 4. Analyze training load
-            logger.info("Analyzing training load")
-            raw_data["training_load"] = _self.fitness_analyzer.analyze_training_load(
-                raw_data.get("recent_activities", [])
-            )
-            
-            # 5. Estimate VO2 max
-            logger.info("Estimating VO2 max")
-            raw_data["vo2_analysis"] = _self.fitness_analyzer.estimate_vo2_max(
+            # 2. Fitness metrics, power, training load and VO2 max in one pass
+            logger.info("Analyzing fitness, power, training load and VO2 max")
+            # Activities become a DataFrame once here and every analysis reads its columns
+            activities_df = self.fitness_analyzer.build_activities_frame(raw_data.get("recent_activities", []))
+            raw_data.update(self.fitness_analyzer.analyze_all(
+                activities_df,
                 raw_data.get("stats"),
-                raw_data.get("recent_activities", [])
-            )
+                raw_data.get("zones")
+            ))
             
-            # 6. Add processing timestamp
+            # 3. Add processing timestamp
             raw_data["processing_completed_at"] = datetime.now().isoformat()
             
             logger.info("Comprehensive rider data processing completed successfully")
@@ -107,17 +93,18 @@ class RiderDataProcessor:
         """
         return self.feature_engineer.get_feature_engineering_data(rider_data)
     
-    def validate_rider_data(self, rider_data: Dict[str, Any]) -> Dict[str, Any]:
+    def validate_rider_data(self, rider_data: Dict[str, Any], copy: bool = False) -> Dict[str, Any]:
         """
         Validate rider data completeness and quality.
         
         Args:
             rider_data: Rider data to validate
+            copy: Return a shallow copy as validated_data instead of rider_data itself
             
         Returns:
             Validation results
         """
-        return self.data_manager.validate_rider_data(rider_data)
+        return self.data_manager.validate_rider_data(rider_data, copy=copy)
     
     def save_rider_data(self, rider_data: Dict[str, Any], user_id: str) -> bool:
         """
@@ -132,6 +119,19 @@ class RiderDataProcessor:
         """
         return self.data_manager.save_rider_data(rider_data, user_id)
     
+    def save_rider_data_async(self, rider_data: Dict[str, Any], user_id: str) -> Future:
+        """
+        Save rider data to storage on a background thread.
+        
+        Args:
+            rider_data: Rider data to save
+            user_id: User identifier
+            
+        Returns:
+            Future resolving to the success boolean
+        """
+        return self.data_manager.save_rider_data_async(rider_data, user_id)
+    
     def load_rider_data(self, user_id: str, filename: str = None) -> Optional[Dict[str, Any]]:
         """
         Load rider data from storage.
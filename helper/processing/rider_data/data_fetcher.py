@@ -9,6 +9,7 @@ This module is responsible for fetching raw data from Strava including:
 """
 
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 
@@ -17,6 +18,9 @@ from ...config.logging_config import get_logger, log_function_entry, log_functio
 
 logger = get_logger(__name__)
 
+# Strava activity types treated as cycling
+CYCLING_TYPES = frozenset({'Ride', 'VirtualRide', 'EBikeRide'})
+
 
 class RiderDataFetcher:
     """Handles fetching rider data from Strava API."""
@@ -47,33 +51,42 @@ class RiderDataFetcher:
         }
         
         try:
-            # 1. Basic athlete information
-            logger.info("Fetching basic athlete information")
-            rider_data["basic_info"] = _self.oauth_client.get_athlete(access_token)
-            
-            # 2. Athlete statistics (includes power records)
-            logger.info("Fetching athlete statistics and power records")
-            try:
-                rider_data["stats"] = _self.oauth_client.get_athlete_stats(access_token)
-            except Exception as e:
-                logger.warning(f"Could not fetch athlete stats: {e}")
-                rider_data["stats"] = None
-            
-            # 3. Power and heart rate zones
-            logger.info("Fetching athlete zones")
-            try:
-                rider_data["zones"] = _self.oauth_client.get_athlete_zones(access_token)
-            except Exception as e:
-                logger.warning(f"Could not fetch zones data: {e}")
-                rider_data["zones"] = None
-            
-            # 4. Recent activities for fitness trend analysis
-            logger.info("Fetching recent activities for fitness analysis")
-            try:
-                rider_data["recent_activities"] = _self._fetch_recent_activities_comprehensive(access_token)
-            except Exception as e:
-                logger.warning(f"Could not fetch recent activities: {e}")
-                rider_data["recent_activities"] = []
+            # The four requests are independent, so issue them concurrently and
+            # wait only as long as the slowest one
+            logger.info("Fetching athlete info, statistics, zones and recent activities")
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                futures = {
+                    "basic_info": executor.submit(_self.oauth_client.get_athlete, access_token),
+                    "stats": executor.submit(_self.oauth_client.get_athlete_stats, access_token),
+                    "zones": executor.submit(_self.oauth_client.get_athlete_zones, access_token),
+                    "recent_activities": executor.submit(
+                        _self._fetch_recent_activities_comprehensive, access_token
+                    ),
+                }
+                
+                # 1. Basic athlete information (required)
+                rider_data["basic_info"] = futures["basic_info"].result()
+                
+                # 2. Athlete statistics (includes power records)
+                try:
+                    rider_data["stats"] = futures["stats"].result()
+                except Exception as e:
+                    logger.warning(f"Could not fetch athlete stats: {e}")
+                    rider_data["stats"] = None
+                
+                # 3. Power and heart rate zones
+                try:
+                    rider_data["zones"] = futures["zones"].result()
+                except Exception as e:
+                    logger.warning(f"Could not fetch zones data: {e}")
+                    rider_data["zones"] = None
+                
+                # 4. Recent activities for fitness trend analysis
+                try:
+                    rider_data["recent_activities"] = futures["recent_activities"].result()
+                except Exception as e:
+                    logger.warning(f"Could not fetch recent activities: {e}")
+                    rider_data["recent_activities"] = []
             
             logger.info(f"Successfully fetched rider data with {len(rider_data['recent_activities'])} activities")
             
@@ -113,7 +126,7 @@ class RiderDataFetcher:
             # Filter to cycling activities only
             cycling_activities = [
                 activity for activity in activities 
-                if activity.get('type') in ['Ride', 'VirtualRide', 'EBikeRide']
+                if activity.get('type') in CYCLING_TYPES
             ]
             
             logger.info(f"Fetched {len(cycling_activities)} cycling activities from last {days_back} days")
@@ -8,16 +8,71 @@ This module provides:
 - Data history management
 """
 
+from concurrent.futures import Future, ThreadPoolExecutor
+from copy import deepcopy
 from datetime import datetime
 from typing import Dict, List, Optional, Any
+import functools
 import hashlib
+import threading
+import time
 
+from ...config.config import get_config
 from ...config.logging_config import get_logger, log_function_entry, log_function_exit
 from ...storage.storage_manager import get_storage_manager
 
 
 logger = get_logger(__name__)
 
+_blake2b = hashlib.blake2b
+
+# Athlete fields replaced by an anonymized value, and fields removed outright
+_ANONYMIZED_NAME_FIELDS = frozenset(("firstname", "lastname"))
+_DROPPED_PROFILE_FIELDS = frozenset(("email", "profile", "profile_medium"))
+
+# Activity fields that reveal where a rider lives or rides
+_LOCATION_PII_FIELDS = frozenset((
+    "start_latlng", "end_latlng", "map", "location_city", "location_state",
+    "location_country", "start_latitude", "start_longitude", "end_latitude", "end_longitude"
+))
+
+# Fields counted by the completeness score
+_COMPLETENESS_BASIC_FIELDS = frozenset(("id", "username", "resource_state", "created_at", "updated_at"))
+_COMPLETENESS_PROCESSED_FIELDS = ("fitness_metrics", "power_analysis", "training_load")
+
+# Shared worker pool for background rider data saves
+_SAVE_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rider-data-save")
+
+# Per-user save counters; part of the latest-file cache key so a save invalidates it
+_rider_data_versions: Dict[str, int] = {}
+# Saves run on _SAVE_POOL, so concurrent bumps for one user must not collide
+_rider_data_versions_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=512)
+def _cached_latest_rider_data_file(user_id: str, version: int, minute: int) -> Optional[str]:
+    """
+    Resolve the newest rider data filename for a user.
+    
+    Cached process-wide; ``version`` and ``minute`` only exist to expire entries
+    after a save or after the current minute.
+    """
+    files = get_storage_manager().list_user_data(user_id, "rider_data", prefix=f"rider_data_{user_id}_")
+    if not files:
+        return None
+    return max(files, key=lambda x: x.get("last_modified", ""))["filename"]
+
+
+def _log_background_save(user_id: str, future: Future) -> None:
+    """
+    Log an exception raised by a background save.
+    
+    save_rider_data logs its own failures; this catches anything that escapes
+    it, which would otherwise only surface through future.result().
+    """
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Background rider data save failed for user %s: %s", user_id, future.exception())
+
 
 class RiderDataManager:
     """Manages rider data validation, storage, and retrieval."""
@@ -25,16 +80,23 @@ class RiderDataManager:
     def __init__(self):
         """Initialize the data manager."""
         self.storage_manager = get_storage_manager()
+        # BLAKE2b accepts keys of at most 64 bytes
+        self._anon_key = get_config().app.anonymization_key.encode('utf-8')[:64]
     
-    def validate_rider_data(self, rider_data: Dict[str, Any]) -> Dict[str, Any]:
+    def validate_rider_data(self, rider_data: Dict[str, Any], copy: bool = False) -> Dict[str, Any]:
         """
         Validate rider data completeness and quality.
         
+        Not cached: the checks are cheaper than hashing the payload to detect
+        in-place edits.
+        
         Args:
             rider_data: Raw rider data from API
+            copy: Return a shallow copy as validated_data instead of rider_data itself
             
         Returns:
-            Dictionary containing validation results and cleaned data
+            Dictionary containing validation results and cleaned data; unless copy
+            is set, validated_data is the caller's rider_data dict, not a copy
         """
         log_function_entry(logger, "validate_rider_data")
         
@@ -43,7 +105,7 @@ class RiderDataManager:
             "completeness_score": 0.0,
             "missing_fields": [],
             "data_quality_issues": [],
-            "validated_data": rider_data.copy()
+            "validated_data": rider_data.copy() if copy else rider_data
         }
         
         try:
@@ -64,22 +126,24 @@ class RiderDataManager:
             if len(validation_result["missing_fields"]) > 2 or validation_result["completeness_score"] < 0.3:
                 validation_result["is_valid"] = False
             
-            logger.info(f"Data validation completed: {validation_result['completeness_score']:.2f} completeness")
+            logger.info("Data validation completed: %.2f completeness", validation_result['completeness_score'])
             
         except Exception as e:
-            logger.error(f"Error during data validation: {e}")
+            logger.error("Error during data validation: %s", e)
             validation_result["is_valid"] = False
             validation_result["data_quality_issues"].append(f"Validation error: {str(e)}")
         
         log_function_exit(logger, "validate_rider_data")
         return validation_result
     
-    def remove_pii_from_rider_data(self, rider_data: Dict[str, Any]) -> Dict[str, Any]:
+    def remove_pii_from_rider_data(self, rider_data: Dict[str, Any],
+                                   now_iso: Optional[str] = None) -> Dict[str, Any]:
         """
         Remove personally identifiable information from rider data.
         
         Args:
             rider_data: Raw rider data containing PII
+            now_iso: ISO timestamp to record as pii_removed_at (defaults to now)
             
         Returns:
             Cleaned rider data with PII removed/anonymized
@@ -91,18 +155,17 @@ class RiderDataManager:
         try:
             # Clean basic_info
             if "basic_info" in cleaned_data and cleaned_data["basic_info"]:
-                basic_info = cleaned_data["basic_info"].copy()
-                
-                # Remove or hash sensitive fields
-                pii_fields = ["firstname", "lastname", "email", "profile", "profile_medium"]
-                for field in pii_fields:
-                    if field in basic_info:
-                        if field in ["firstname", "lastname"]:
-                            # Replace with anonymized version
-                            basic_info[field] = f"User_{hashlib.md5(str(basic_info[field]).encode()).hexdigest()[:8]}"
-                        else:
-                            # Remove completely
-                            del basic_info[field]
+                # Rebuild in one pass: anonymize names, drop contact/profile fields
+                basic_info = {}
+                for field, value in cleaned_data["basic_info"].items():
+                    if field in _ANONYMIZED_NAME_FIELDS:
+                        # Keyed 4-byte BLAKE2b digest gives exactly 8 hex chars
+                        basic_info[field] = "User_" + _blake2b(
+                            str(value).encode('utf-8', 'ignore'),
+                            digest_size=4, key=self._anon_key
+                        ).hexdigest()
+                    elif field not in _DROPPED_PROFILE_FIELDS:
+                        basic_info[field] = value
                 
                 cleaned_data["basic_info"] = basic_info
             
@@ -110,33 +173,25 @@ class RiderDataManager:
             if "recent_activities" in cleaned_data and cleaned_data["recent_activities"]:
                 cleaned_activities = []
                 for activity in cleaned_data["recent_activities"]:
-                    cleaned_activity = activity.copy()
-                    
-                    # Remove location and route data
-                    location_fields = ["start_latlng", "end_latlng", "map", "location_city", 
-                                     "location_state", "location_country", "start_latitude", 
-                                     "start_longitude", "end_latitude", "end_longitude"]
-                    for field in location_fields:
-                        if field in cleaned_activity:
-                            del cleaned_activity[field]
+                    # Copy everything except location and route data in one pass
+                    cleaned_activity = {k: v for k, v in activity.items() if k not in _LOCATION_PII_FIELDS}
                     
                     # Anonymize activity names that might contain personal info
-                    if "name" in cleaned_activity:
-                        cleaned_activity["name"] = f"Activity_{cleaned_activity.get('id', 'unknown')}"
+                    if "name" in activity:
+                        cleaned_activity["name"] = "Activity_" + str(activity.get('id', 'unknown'))
                     
                     cleaned_activities.append(cleaned_activity)
                 
                 cleaned_data["recent_activities"] = cleaned_activities
             
             # Add anonymization timestamp
-            cleaned_data["pii_removed_at"] = datetime.now().isoformat()
+            cleaned_data["pii_removed_at"] = now_iso or datetime.now().isoformat()
             
             logger.info("PII removal completed successfully")
             
         except Exception as e:
-            logger.error(f"Error removing PII: {e}")
-            # Return original data if cleaning fails
-            cleaned_data = rider_data.copy()
+            logger.error("Error removing PII: %s", e)
+            # Flag the failure on the copy made above instead of copying again
             cleaned_data["pii_removal_error"] = str(e)
         
         log_function_exit(logger, "remove_pii_from_rider_data")
@@ -156,33 +211,60 @@ class RiderDataManager:
         log_function_entry(logger, "save_rider_data")
         
         try:
+            # One clock read for the PII stamp, saved_at and the filename
+            now = datetime.now()
+            now_iso = now.isoformat()
+            
             # Remove PII before saving
-            cleaned_data = self.remove_pii_from_rider_data(rider_data)
+            cleaned_data = self.remove_pii_from_rider_data(rider_data, now_iso=now_iso)
             
             # Add metadata
-            cleaned_data["saved_at"] = datetime.now().isoformat()
+            cleaned_data["saved_at"] = now_iso
             cleaned_data["user_id"] = user_id
             
             # Generate filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = now.strftime("%Y%m%d_%H%M%S")
             filename = f"rider_data_{user_id}_{timestamp}.json"
             
-            # Save to storage
-            success = self.storage_manager.save_data(cleaned_data, filename, "rider_data")
+            # Save to storage; dicts are serialized with orjson by the storage backends
+            success = self.storage_manager.save_data(cleaned_data, user_id, "rider_data", filename)
             
             if success:
-                logger.info(f"Rider data saved successfully: {filename}")
+                with _rider_data_versions_lock:
+                    _rider_data_versions[user_id] = _rider_data_versions.get(user_id, 0) + 1
+                logger.info("Rider data saved successfully: %s", filename)
             else:
-                logger.error(f"Failed to save rider data: {filename}")
+                logger.error("Failed to save rider data: %s", filename)
             
             log_function_exit(logger, "save_rider_data")
             return success
             
         except Exception as e:
-            logger.error(f"Error saving rider data: {e}")
+            logger.error("Error saving rider data: %s", e)
             log_function_exit(logger, "save_rider_data")
             return False
     
+    def save_rider_data_async(self, rider_data: Dict[str, Any], user_id: str) -> Future:
+        """
+        Save rider data on a background thread.
+        
+        PII removal, serialization and the storage write all run off the
+        caller's thread, so interactive callers can return immediately. The
+        data is deep-copied first, so the caller may keep modifying it.
+        
+        Args:
+            rider_data: Rider data to save
+            user_id: Unique identifier for the user
+            
+        Returns:
+            Future resolving to the same success boolean as save_rider_data
+        """
+        # Snapshot everything, nested activities included, so later changes by
+        # the caller don't race the anonymizer or the serializer
+        future = _SAVE_POOL.submit(self.save_rider_data, deepcopy(rider_data), user_id)
+        future.add_done_callback(functools.partial(_log_background_save, user_id))
+        return future
+    
     def load_rider_data(self, user_id: str, filename: str = None) -> Optional[Dict[str, Any]]:
         """
         Load rider data from storage.
@@ -197,34 +279,35 @@ class RiderDataManager:
         log_function_entry(logger, "load_rider_data")
         
         try:
-            if filename:
-                # Load specific file
-                data = self.storage_manager.load_data(filename, "rider_data")
-            else:
+            if not filename:
                 # Load latest file for user
-                files = self.get_rider_data_history(user_id)
-                if not files:
-                    logger.info(f"No rider data found for user: {user_id}")
+                filename = self._latest_filename(user_id)
+                if not filename:
+                    logger.info("No rider data found for user: %s", user_id)
                     log_function_exit(logger, "load_rider_data")
                     return None
-                
-                # Get most recent file
-                latest_file = max(files, key=lambda x: x.get("modified_date", ""))
-                data = self.storage_manager.load_data(latest_file["filename"], "rider_data")
+            
+            data = self.storage_manager.load_data(user_id, "rider_data", filename)
             
             if data:
-                logger.info(f"Rider data loaded successfully for user: {user_id}")
+                logger.info("Rider data loaded successfully for user: %s", user_id)
             else:
-                logger.warning(f"Failed to load rider data for user: {user_id}")
+                logger.warning("Failed to load rider data for user: %s", user_id)
             
             log_function_exit(logger, "load_rider_data")
             return data
             
         except Exception as e:
-            logger.error(f"Error loading rider data: {e}")
+            logger.error("Error loading rider data: %s", e)
             log_function_exit(logger, "load_rider_data")
             return None
     
+    def _latest_filename(self, user_id: str) -> Optional[str]:
+        """Get the newest rider data filename for a user, reusing lookups from the last minute."""
+        return _cached_latest_rider_data_file(
+            user_id, _rider_data_versions.get(user_id, 0), int(time.time()) // 60
+        )
+    
     def get_rider_data_history(self, user_id: str) -> List[Dict[str, Any]]:
         """
         Get history of saved rider data files for a user.
@@ -238,25 +321,19 @@ class RiderDataManager:
         log_function_entry(logger, "get_rider_data_history")
         
         try:
-            # List all files in rider_data directory
-            all_files = self.storage_manager.list_files("rider_data")
-            
-            # Filter files for this user
-            user_files = [
-                file_info for file_info in all_files
-                if file_info["filename"].startswith(f"rider_data_{user_id}_")
-            ]
-            
-            # Sort by modification date (newest first)
-            user_files.sort(key=lambda x: x.get("modified_date", ""), reverse=True)
+            # List only this user's rider data files, newest first; the prefix is
+            # applied by the backend
+            user_files = self.storage_manager.list_user_data(
+                user_id, "rider_data", prefix=f"rider_data_{user_id}_"
+            )
             
-            logger.info(f"Found {len(user_files)} rider data files for user: {user_id}")
+            logger.info("Found %d rider data files for user: %s", len(user_files), user_id)
             
             log_function_exit(logger, "get_rider_data_history")
             return user_files
             
         except Exception as e:
-            logger.error(f"Error getting rider data history: {e}")
+            logger.error("Error getting rider data history: %s", e)
             log_function_exit(logger, "get_rider_data_history")
             return []
     
@@ -267,9 +344,8 @@ class RiderDataManager:
         
         # Check basic_info completeness
         if "basic_info" in rider_data and rider_data["basic_info"]:
-            basic_fields = ["id", "username", "resource_state", "created_at", "updated_at"]
-            total_fields += len(basic_fields)
-            present_fields += sum(1 for field in basic_fields if field in rider_data["basic_info"])
+            total_fields += len(_COMPLETENESS_BASIC_FIELDS)
+            present_fields += len(rider_data["basic_info"].keys() & _COMPLETENESS_BASIC_FIELDS)
         
         # Check stats completeness
         if "stats" in rider_data and rider_data["stats"]:
@@ -288,8 +364,7 @@ class RiderDataManager:
                 present_fields += 1
         
         # Check for processed metrics
-        processed_fields = ["fitness_metrics", "power_analysis", "training_load"]
-        for field in processed_fields:
+        for field in _COMPLETENESS_PROCESSED_FIELDS:
             total_fields += 1
             if field in rider_data and rider_data[field]:
                 present_fields += 1
@@ -307,8 +382,7 @@ class RiderDataManager:
                 issues.append("Limited activity data (< 5 activities)")
             
             # Check for data consistency
-            power_activities = [a for a in activities if a.get("average_watts", 0) > 0]
-            if len(power_activities) == 0:
+            if not any(a.get("average_watts", 0) > 0 for a in activities):
                 issues.append("No power data available in activities")
         
         # Check basic info consistency
@@ -8,43 +8,333 @@ This module handles:
 - Feature engineering pipeline
 """
 
+import hashlib
+import io
+import json
 import pandas as pd
 import numpy as np
+from collections import Counter, OrderedDict
 from datetime import datetime
-from typing import Dict, List, Any
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
 
-from ...config.logging_config import get_logger, log_function_entry, log_function_exit
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from ...config.config import get_config
+from ...config.logging_config import get_logger
+from ...storage.storage_manager import get_storage_manager
 
 
 logger = get_logger(__name__)
 
+# Top-level rider data sections that any feature is extracted from
+_KNOWN_KEYS = frozenset({
+    "basic_info",
+    "zones",
+    "power_analysis",
+    "vo2_analysis",
+    "recent_activities",
+    "fitness_metrics",
+    "training_load"
+})
+
+# Feature categories in the order they appear in the result
+_FEATURE_CATEGORIES = (
+    "basic_features",
+    "performance_features",
+    "training_features",
+    "temporal_features",
+    "composite_scores"
+)
+
+# Numeric encoding of VO2 max classifications; anything else encodes as 0
+_VO2_CLASSIFICATION_MAP = {
+    "Elite": 5,
+    "Excellent": 4,
+    "Good": 3,
+    "Fair": 2,
+    "Poor": 1,
+    "Unknown": 0
+}
+
+# basic_info numeric fields and the feature names they are stored under
+_BASIC_NUMERIC_MAP = {
+    "follower_count": "follower_count",
+    "friend_count": "friend_count",
+    "mutual_friend_count": "mutual_friend_count",
+    "weight": "weight_kg",
+    "ftp": "athlete_ftp"
+}
+
+# (source key, feature name) pairs copied from each section, defaulting to 0
+_POWER_TREND_FIELDS = (
+    ("trend_value", "power_trend_value"),
+    ("recent_power_avg", "recent_power_avg")
+)
+_FITNESS_SECTION_FIELDS = {
+    "activity_frequency": (
+        ("activities_per_week", "activities_per_week"),
+        ("total_activities", "total_activities")
+    ),
+    "training_hours": (
+        ("hours_per_week", "hours_per_week"),
+        ("total_hours", "total_training_hours")
+    ),
+    "intensity_distribution": (
+        ("average_power", "average_training_power"),
+        ("power_variability", "power_variability")
+    )
+}
+_STRESS_BALANCE_FIELDS = (
+    ("stress_balance", "training_stress_balance"),
+    ("recent_weekly_stress", "recent_weekly_stress")
+)
+
+# Activity fields summarised by _activity_stats_kernel, one matrix row each;
+# distance keeps zero values, the others only count strictly positive ones
+_ACTIVITY_STAT_FIELDS = ("distance", "average_speed", "total_elevation_gain", "average_heartrate", "average_watts")
+
+# Output keys for the scores returned by _composite_scores, in order
+_COMPOSITE_SCORE_NAMES = (
+    "overall_fitness_score",
+    "training_quality_score",
+    "performance_trend_score",
+    "experience_score"
+)
+
+# Number of recent feature results kept per FeatureEngineer
+_FEATURE_CACHE_SIZE = 128
+
+# Storage location and per-rider retention for persisted feature results
+_FEATURE_STORE_DATA_TYPE = "features"
+_FEATURE_STORE_FILES_PER_RIDER = 5
+_FEATURE_STORE_REQUIRED_COLUMNS = frozenset(("feature_extraction_timestamp", "total_features"))
+
+if orjson is not None:
+    _ORJSON_HASH_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _rider_data_digest(rider_data: Dict[str, Any]) -> Optional[bytes]:
+    """Stable content hash of rider data, or None if it cannot be serialized."""
+    try:
+        if orjson is not None:
+            payload = orjson.dumps(rider_data, option=_ORJSON_HASH_OPTIONS)
+        else:
+            payload = json.dumps(rider_data, sort_keys=True, default=str).encode()
+    except (TypeError, ValueError):
+        return None
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+def _copy_features(features: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a features dict so callers cannot modify the cached categories."""
+    return {key: dict(value) if isinstance(value, dict) else value for key, value in features.items()}
+
+
+def _activity_column(activities: List[Dict], key: str, n: int) -> np.ndarray:
+    """Pull one numeric field out of the activity dicts, using NaN for gaps."""
+    return np.fromiter(
+        (np.nan if (value := a.get(key)) is None else value for a in activities),
+        dtype=np.float64,
+        count=n
+    )
+
+
+def _activity_stats_kernel(values: np.ndarray, mask: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Masked statistics for every row of a (fields x activities) matrix at once.
+    
+    Args:
+        values: Field values, one row per field
+        mask: Which values take part in each row's statistics
+        
+    Returns:
+        Tuple of per-row (count, mean, max, sample std) arrays; mean and max are NaN
+        for empty rows and std is NaN for rows with fewer than two values
+    """
+    counts = mask.sum(axis=1)
+    filled = np.where(mask, values, 0.0)
+    # Sum and sum of squares come from the same masked matrix, so the variance
+    # needs no second pass over the deviations from the mean
+    sums = filled.sum(axis=1)
+    sums_sq = np.einsum("ij,ij->i", filled, filled)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+        variances = (sums_sq - sums * means) / (counts - 1)
+        stds = np.sqrt(np.maximum(variances, 0.0))
+    maxes = np.where(mask, values, -np.inf).max(axis=1)
+    maxes[counts == 0] = np.nan
+    stds[counts < 2] = np.nan
+    return counts, means, maxes, stds
+
+
+def _sample_std(values: np.ndarray) -> float:
+    """Sample standard deviation (ddof=1), NaN for fewer than two values like pandas."""
+    return values.std(ddof=1) if values.size > 1 else np.nan
+
+
+@lru_cache(maxsize=512)
+def _composite_scores(vo2_max, power_avg, consistency, freq, intensity_ratio,
+                      power_trend, age_years, total_activities) -> Tuple[Optional[float], ...]:
+    """
+    Compute composite scores from scalar feature inputs (None marks a missing input).
+    
+    Returns:
+        Tuple of (overall fitness, training quality, performance trend, experience)
+        scores, each None when none of its inputs are available
+    """
+    # Overall fitness score (0-100)
+    fitness_components = []
+    
+    # Cardiovascular fitness component
+    if vo2_max is not None:
+        cv_score = min(vo2_max / 70 * 100, 100)  # Normalize to 100, cap at 70 VO2 max
+        fitness_components.append(cv_score)
+    
+    # Power performance component
+    if power_avg is not None:
+        power_score = min(power_avg / 300 * 100, 100)  # Normalize to 100, cap at 300W
+        fitness_components.append(power_score)
+    
+    # Training consistency component
+    if consistency is not None:
+        consistency_score = consistency * 100
+        fitness_components.append(consistency_score)
+    
+    # Training quality score (0-100)
+    quality_components = []
+    
+    # Training frequency
+    if freq is not None:
+        freq_score = min(freq / 5 * 100, 100)  # Normalize to 5 activities per week
+        quality_components.append(freq_score)
+    
+    # Training intensity balance
+    if intensity_ratio is not None:
+        # Optimal ratio around 0.2 (20% high intensity)
+        intensity_score = 100 - abs(intensity_ratio - 0.2) * 500
+        intensity_score = max(0, min(100, intensity_score))
+        quality_components.append(intensity_score)
+    
+    # Performance trend score (-100 to +100)
+    trend_components = []
+    
+    if power_trend is not None:
+        trend_components.append(power_trend * 100)  # Convert to percentage
+    
+    # Experience score (0-100)
+    experience_components = []
+    
+    if age_years is not None:
+        exp_score = min(age_years / 5 * 100, 100)  # Normalize to 5 years experience
+        experience_components.append(exp_score)
+    
+    if total_activities is not None:
+        activity_exp_score = min(total_activities / 500 * 100, 100)  # Normalize to 500 activities
+        experience_components.append(activity_exp_score)
+    
+    return tuple(
+        sum(components) / len(components) if components else None
+        for components in (fitness_components, quality_components, trend_components, experience_components)
+    )
+
+
+def _flatten_features(features: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a features dict to one level with "category.feature" keys."""
+    flat = {}
+    for key, value in features.items():
+        if isinstance(value, dict):
+            for name, feature in value.items():
+                flat[f"{key}.{name}"] = feature
+        else:
+            flat[key] = value
+    return flat
+
+
+def _unflatten_features(flat: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuild a features dict from the output of _flatten_features."""
+    features = {key: {} for key in _FEATURE_CATEGORIES}
+    for key, value in flat.items():
+        category, separator, name = key.partition(".")
+        if separator:
+            features.setdefault(category, {})[name] = value
+        else:
+            features[key] = value
+    return features
+
+
+def _is_stored_features_layout(columns) -> bool:
+    """Check that Parquet columns match the output of _flatten_features."""
+    columns = set(columns)
+    if not _FEATURE_STORE_REQUIRED_COLUMNS <= columns:
+        return False
+    for column in columns - _FEATURE_STORE_REQUIRED_COLUMNS:
+        category, separator, _ = column.partition(".")
+        if not separator or category not in _FEATURE_CATEGORIES:
+            return False
+    return True
+
 
 class FeatureEngineer:
     """Handles feature engineering for rider data."""
     
+    def __init__(self):
+        """Initialize the feature engineer with an empty result cache."""
+        self._feature_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self.storage_manager = get_storage_manager() if get_config().app.enable_feature_cache else None
+    
     def get_feature_engineering_data(self, rider_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Extract features suitable for machine learning from rider data.
         
         Args:
-            rider_data: Complete rider data dictionary
+            rider_data: Complete rider data dictionary; set "no_cache" to bypass the result cache
             
         Returns:
-            Dictionary containing engineered features
+            Dictionary containing engineered features; cached results are copied,
+            so callers may modify it freely
         """
-        log_function_entry(logger, "get_feature_engineering_data")
+        now = datetime.now()
         
-        features = {
-            "basic_features": {},
-            "performance_features": {},
-            "training_features": {},
-            "temporal_features": {},
-            "composite_scores": {}
-        }
+        # Nothing to extract from; skip hashing and the extraction steps entirely
+        if _KNOWN_KEYS.isdisjoint(rider_data):
+            features = {key: {} for key in _FEATURE_CATEGORIES}
+            features["feature_extraction_timestamp"] = now.isoformat()
+            features["total_features"] = 0
+            return features
+        
+        # Results depend on the clock too, so cached entries only live for the current minute
+        cache_key = None
+        if not rider_data.get("no_cache"):
+            digest = _rider_data_digest(rider_data)
+            if digest is not None:
+                cache_key = (digest, int(now.timestamp() // 60))
+                cached = self._feature_cache.get(cache_key)
+                if cached is not None:
+                    self._feature_cache.move_to_end(cache_key)
+                    return _copy_features(cached)
+        
+        # Persisted results are shared across sessions and keyed by day rather than minute
+        rider_id = None
+        stored_filename = None
+        if cache_key is not None and self.storage_manager is not None:
+            rider_id = (rider_data.get("basic_info") or {}).get("id")
+            if rider_id is not None:
+                rider_id = str(rider_id)
+                stored_filename = f"features_{rider_id}_{now:%Y%m%d}_{cache_key[0].hex()}.parquet"
+                stored = self._load_stored_features(rider_id, stored_filename)
+                if stored is not None:
+                    self._remember_features(cache_key, stored)
+                    return _copy_features(stored)
+        
+        features = {key: {} for key in _FEATURE_CATEGORIES}
         
         try:
             # Extract basic features
-            features["basic_features"] = self._extract_basic_features(rider_data)
+            features["basic_features"] = self._extract_basic_features(rider_data, now)
             
             # Extract performance features (pass basic features for FTP fallback)
             features["performance_features"] = self._extract_performance_features(rider_data, features["basic_features"])
@@ -53,27 +343,90 @@ class FeatureEngineer:
             features["training_features"] = self._extract_training_features(rider_data)
             
             # Extract temporal features
-            features["temporal_features"] = self._extract_temporal_features(rider_data)
+            features["temporal_features"] = self._extract_temporal_features(rider_data, now)
             
             # Calculate composite performance scores
             features["composite_scores"] = self._calculate_composite_performance_scores(features)
             
             # Add metadata
-            features["feature_extraction_timestamp"] = datetime.now().isoformat()
+            features["feature_extraction_timestamp"] = now.isoformat()
             features["total_features"] = self._count_total_features(features)
             
-            logger.info(f"Feature engineering completed: {features['total_features']} features extracted")
+            logger.info("Feature engineering completed: %d features extracted", features["total_features"])
             
         except Exception as e:
-            logger.error(f"Error in feature engineering: {e}")
+            logger.error("Error in feature engineering: %s", e)
             features["error"] = str(e)
         
-        log_function_exit(logger, "get_feature_engineering_data")
+        if cache_key is not None and "error" not in features:
+            self._remember_features(cache_key, _copy_features(features))
+            if stored_filename is not None:
+                self._store_features(rider_id, stored_filename, features)
+        
         return features
     
-    def _extract_basic_features(self, rider_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _remember_features(self, cache_key: tuple, features: Dict[str, Any]) -> None:
+        """Add a result to the in-memory cache, evicting the least recently used entry."""
+        self._feature_cache[cache_key] = features
+        if len(self._feature_cache) > _FEATURE_CACHE_SIZE:
+            self._feature_cache.popitem(last=False)
+    
+    def _load_stored_features(self, rider_id: str, filename: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a persisted feature result.
+        
+        Args:
+            rider_id: Rider identifier the result is stored under
+            filename: Parquet file name of the result
+            
+        Returns:
+            Features dictionary, or None if nothing usable is stored
+        """
+        try:
+            data = self.storage_manager.load_data(rider_id, _FEATURE_STORE_DATA_TYPE, filename)
+            if not isinstance(data, bytes):
+                return None
+            stored_df = pd.read_parquet(io.BytesIO(data))
+            
+            # Anything not written by _store_features is recomputed and overwritten
+            if len(stored_df) != 1 or not _is_stored_features_layout(stored_df.columns):
+                logger.warning("Ignoring stored features with unexpected layout for rider %s: %s", rider_id, filename)
+                return None
+            return _unflatten_features(stored_df.to_dict("records")[0])
+            
+        except Exception as e:
+            logger.warning("Error loading stored features for rider %s: %s", rider_id, e)
+            return None
+    
+    def _store_features(self, rider_id: str, filename: str, features: Dict[str, Any]) -> None:
+        """
+        Persist a feature result as a single-row Parquet file and prune old results.
+        
+        Args:
+            rider_id: Rider identifier to store the result under
+            filename: Parquet file name for the result
+            features: Features dictionary to persist
+        """
+        try:
+            buffer = io.BytesIO()
+            pd.DataFrame([_flatten_features(features)]).to_parquet(buffer, index=False, compression='zstd')
+            if not self.storage_manager.save_data(buffer.getvalue(), rider_id, _FEATURE_STORE_DATA_TYPE, filename):
+                return
+            
+            # Keep only the most recently written results for this rider
+            stored_files = self.storage_manager.list_user_data(
+                rider_id, _FEATURE_STORE_DATA_TYPE, prefix=f"features_{rider_id}_"
+            )
+            for stale in stored_files[_FEATURE_STORE_FILES_PER_RIDER:]:
+                self.storage_manager.delete_data(rider_id, _FEATURE_STORE_DATA_TYPE, stale["filename"])
+                
+        except Exception as e:
+            logger.warning("Error storing features for rider %s: %s", rider_id, e)
+    
+    def _extract_basic_features(self, rider_data: Dict[str, Any], now: Optional[datetime] = None) -> Dict[str, Any]:
         """Extract basic athlete features."""
         basic_features = {}
+        now = now or datetime.now()
         
         if "basic_info" in rider_data and rider_data["basic_info"]:
             basic_info = rider_data["basic_info"]
@@ -82,22 +435,17 @@ class FeatureEngineer:
             if "created_at" in basic_info:
                 try:
                     created_date = datetime.fromisoformat(basic_info["created_at"].replace('Z', '+00:00'))
-                    account_age_days = (datetime.now() - created_date.replace(tzinfo=None)).days
+                    account_age_days = (now - created_date.replace(tzinfo=None)).days
                     basic_features["account_age_days"] = account_age_days
                     basic_features["account_age_years"] = account_age_days / 365.25
                 except:
                     pass
             
             # Extract available numeric fields including weight and FTP
-            numeric_fields = ["follower_count", "friend_count", "mutual_friend_count", "weight", "ftp"]
-            for field in numeric_fields:
-                if field in basic_info and isinstance(basic_info[field], (int, float)):
-                    if field == "weight":
-                        basic_features["weight_kg"] = basic_info[field]
-                    elif field == "ftp":
-                        basic_features["athlete_ftp"] = basic_info[field]
-                    else:
-                        basic_features[field] = basic_info[field]
+            for field, feature_name in _BASIC_NUMERIC_MAP.items():
+                value = basic_info.get(field)
+                if isinstance(value, (int, float)):
+                    basic_features[feature_name] = value
         
         return basic_features
     
@@ -105,22 +453,15 @@ class FeatureEngineer:
         """Extract performance-related features."""
         performance_features = {}
         
-        # Extract FTP from zones data as primary source
-        if "zones" in rider_data and rider_data["zones"]:
-            zones_data = rider_data["zones"]
-            
-            # Look for power zones with FTP information
-            if "power" in zones_data and zones_data["power"]:
-                power_zones = zones_data["power"]
-                if "zones" in power_zones and power_zones["zones"]:
-                    # FTP is typically the upper boundary of Zone 4 (Threshold)
-                    # or we can infer it from zone boundaries
-                    zones_list = power_zones["zones"]
-                    if len(zones_list) >= 4:  # Should have at least 4 zones
-                        # Zone 4 (threshold) upper boundary is typically close to FTP
-                        zone4_max = zones_list[3].get("max", 0)
-                        if zone4_max > 0:
-                            performance_features["estimated_ftp"] = zone4_max
+        # Extract FTP from zones data as primary source: the upper boundary of
+        # Zone 4 (Threshold) is typically close to FTP. Missing zones data, or fewer
+        # than four power zones, simply leaves it unset.
+        try:
+            zone4_max = rider_data["zones"]["power"]["zones"][3].get("max", 0)
+            if zone4_max > 0:
+                performance_features["estimated_ftp"] = zone4_max
+        except (KeyError, IndexError, TypeError, AttributeError):
+            pass
         
         # If no FTP from zones, try to get from basic_features (athlete_ftp)
         if "estimated_ftp" not in performance_features and basic_features:
@@ -133,8 +474,8 @@ class FeatureEngineer:
             
             if "power_trend" in power_data:
                 trend = power_data["power_trend"]
-                performance_features["power_trend_value"] = trend.get("trend_value", 0)
-                performance_features["recent_power_avg"] = trend.get("recent_power_avg", 0)
+                for field, feature_name in _POWER_TREND_FIELDS:
+                    performance_features[feature_name] = trend.get(field, 0)
                 performance_features["power_improving"] = 1 if trend.get("trend") == "improving" else 0
             
             if "weighted_power_avg" in power_data:
@@ -164,23 +505,17 @@ class FeatureEngineer:
         if "fitness_metrics" in rider_data and rider_data["fitness_metrics"]:
             fitness_data = rider_data["fitness_metrics"]
             
-            if "activity_frequency" in fitness_data:
-                freq_data = fitness_data["activity_frequency"]
-                training_features["activities_per_week"] = freq_data.get("activities_per_week", 0)
-                training_features["total_activities"] = freq_data.get("total_activities", 0)
-            
-            if "training_hours" in fitness_data:
-                hours_data = fitness_data["training_hours"]
-                training_features["hours_per_week"] = hours_data.get("hours_per_week", 0)
-                training_features["total_training_hours"] = hours_data.get("total_hours", 0)
+            for section, fields in _FITNESS_SECTION_FIELDS.items():
+                if section in fitness_data:
+                    section_data = fitness_data[section]
+                    for field, feature_name in fields:
+                        training_features[feature_name] = section_data.get(field, 0)
             
             if "consistency" in fitness_data:
                 training_features["training_consistency"] = fitness_data["consistency"]
             
             if "intensity_distribution" in fitness_data:
                 intensity_data = fitness_data["intensity_distribution"]
-                training_features["average_training_power"] = intensity_data.get("average_power", 0)
-                training_features["power_variability"] = intensity_data.get("power_variability", 0)
                 training_features["high_intensity_ratio"] = (
                     intensity_data.get("high_intensity_sessions", 0) / 
                     max(intensity_data.get("total_power_sessions", 1), 1)
@@ -195,46 +530,50 @@ class FeatureEngineer:
             
             if "stress_balance" in load_data:
                 stress_data = load_data["stress_balance"]
-                training_features["training_stress_balance"] = stress_data.get("stress_balance", 0)
-                training_features["recent_weekly_stress"] = stress_data.get("recent_weekly_stress", 0)
+                for field, feature_name in _STRESS_BALANCE_FIELDS:
+                    training_features[feature_name] = stress_data.get(field, 0)
         
         return training_features
     
-    def _extract_temporal_features(self, rider_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _extract_temporal_features(self, rider_data: Dict[str, Any], now: Optional[datetime] = None) -> Dict[str, Any]:
         """Extract time-based features."""
         temporal_features = {}
+        now = now or datetime.now()
         
         if "recent_activities" in rider_data and rider_data["recent_activities"]:
             activities = rider_data["recent_activities"]
-            df = pd.DataFrame(activities)
             
-            if not df.empty and "start_date" in df.columns:
-                df["start_date"] = pd.to_datetime(df["start_date"])
+            if any("start_date" in a for a in activities):
+                # Parse once to naive UTC datetime64 and drop missing dates
+                start_dates = pd.to_datetime([a.get("start_date") for a in activities], utc=True).tz_convert(None).to_numpy()
+                start_dates = start_dates[~np.isnat(start_dates)]
+                total_activities = len(activities)
                 
                 # Time since last activity
-                last_activity = df["start_date"].max()
-                days_since_last = (datetime.now() - last_activity.replace(tzinfo=None)).days
-                temporal_features["days_since_last_activity"] = days_since_last
+                if start_dates.size:
+                    last_activity = start_dates.max().astype("datetime64[us]").item()
+                    temporal_features["days_since_last_activity"] = (now - last_activity).days
+                else:
+                    temporal_features["days_since_last_activity"] = np.nan
                 
-                # Activity patterns
-                df["hour"] = df["start_date"].dt.hour
-                df["day_of_week"] = df["start_date"].dt.dayofweek
+                # Activity patterns; the Unix epoch fell on a Thursday (Monday=0)
+                hours = start_dates.astype("datetime64[h]").astype(np.int64) % 24
+                days_of_week = (start_dates.astype("datetime64[D]").astype(np.int64) + 3) % 7
+                hour_counts = np.bincount(hours, minlength=24)
+                day_counts = np.bincount(days_of_week, minlength=7)
                 
-                # Preferred training times
-                temporal_features["most_common_hour"] = df["hour"].mode().iloc[0] if not df["hour"].mode().empty else 12
-                temporal_features["most_common_day"] = df["day_of_week"].mode().iloc[0] if not df["day_of_week"].mode().empty else 0
+                # Preferred training times (argmax picks the earliest on ties, like mode)
+                temporal_features["most_common_hour"] = hour_counts.argmax() if start_dates.size else 12
+                temporal_features["most_common_day"] = day_counts.argmax() if start_dates.size else 0
                 
                 # Morning vs evening preference
-                morning_activities = len(df[df["hour"] < 12])
-                evening_activities = len(df[df["hour"] >= 18])
-                total_activities = len(df)
+                temporal_features["morning_training_ratio"] = hour_counts[:12].sum() / total_activities
+                temporal_features["evening_training_ratio"] = hour_counts[18:].sum() / total_activities
                 
-                temporal_features["morning_training_ratio"] = morning_activities / total_activities
-                temporal_features["evening_training_ratio"] = evening_activities / total_activities
-                
-                # Weekly pattern consistency
-                weekly_pattern = df.groupby("day_of_week").size()
-                temporal_features["weekly_pattern_consistency"] = 1 - (weekly_pattern.std() / weekly_pattern.mean()) if weekly_pattern.mean() > 0 else 0
+                # Weekly pattern consistency over the days that have activities
+                weekly_pattern = day_counts[day_counts > 0]
+                weekly_mean = weekly_pattern.mean() if weekly_pattern.size else 0
+                temporal_features["weekly_pattern_consistency"] = 1 - (_sample_std(weekly_pattern) / weekly_mean) if weekly_mean > 0 else 0
         
         return temporal_features
     
@@ -245,51 +584,55 @@ class FeatureEngineer:
         if not activities:
             return features
         
-        df = pd.DataFrame(activities)
+        n = len(activities)
+        present = [any(key in a for a in activities) for key in _ACTIVITY_STAT_FIELDS]
+        values = np.empty((len(_ACTIVITY_STAT_FIELDS), n), dtype=np.float64)
+        for row, key in enumerate(_ACTIVITY_STAT_FIELDS):
+            values[row] = _activity_column(activities, key, n)
+        mask = values > 0
+        mask[0] = ~np.isnan(values[0])
+        counts, means, maxes, stds = _activity_stats_kernel(values, mask)
+        # Fields holding only ints were int64 columns, so keep their maxima integral
+        maxes = [
+            np.int64(value) if count and all(type(a.get(key)) is int for a in activities) else value
+            for key, count, value in zip(_ACTIVITY_STAT_FIELDS, counts, maxes)
+        ]
         
         # Distance features
-        if "distance" in df.columns:
-            features["avg_distance"] = df["distance"].mean()
-            features["max_distance"] = df["distance"].max()
-            features["distance_variability"] = df["distance"].std()
+        if present[0]:
+            features["avg_distance"] = means[0]
+            features["max_distance"] = maxes[0]
+            features["distance_variability"] = stds[0]
         
         # Speed features
-        if "average_speed" in df.columns:
-            speed_df = df[df["average_speed"] > 0]
-            if not speed_df.empty:
-                features["avg_speed"] = speed_df["average_speed"].mean()
-                features["max_speed"] = speed_df["average_speed"].max()
-                features["speed_consistency"] = 1 - (speed_df["average_speed"].std() / speed_df["average_speed"].mean())
+        if present[1] and counts[1]:
+            features["avg_speed"] = means[1]
+            features["max_speed"] = maxes[1]
+            features["speed_consistency"] = 1 - (stds[1] / means[1])
         
         # Elevation features
-        if "total_elevation_gain" in df.columns:
-            elev_df = df[df["total_elevation_gain"] > 0]
-            if not elev_df.empty:
-                features["avg_elevation_gain"] = elev_df["total_elevation_gain"].mean()
-                features["max_elevation_gain"] = elev_df["total_elevation_gain"].max()
-                features["climbing_preference"] = len(elev_df) / len(df)
+        if present[2] and counts[2]:
+            features["avg_elevation_gain"] = means[2]
+            features["max_elevation_gain"] = maxes[2]
+            features["climbing_preference"] = counts[2] / n
         
         # Heart rate features
-        if "average_heartrate" in df.columns:
-            hr_df = df[df["average_heartrate"] > 0]
-            if not hr_df.empty:
-                features["avg_heart_rate"] = hr_df["average_heartrate"].mean()
-                features["max_heart_rate"] = hr_df["average_heartrate"].max()
-                features["hr_variability"] = hr_df["average_heartrate"].std()
+        if present[3] and counts[3]:
+            features["avg_heart_rate"] = means[3]
+            features["max_heart_rate"] = maxes[3]
+            features["hr_variability"] = stds[3]
         
         # Power features
-        if "average_watts" in df.columns:
-            power_df = df[df["average_watts"] > 0]
-            if not power_df.empty:
-                features["avg_power"] = power_df["average_watts"].mean()
-                features["max_power"] = power_df["average_watts"].max()
-                features["power_consistency"] = 1 - (power_df["average_watts"].std() / power_df["average_watts"].mean())
+        if present[4] and counts[4]:
+            features["avg_power"] = means[4]
+            features["max_power"] = maxes[4]
+            features["power_consistency"] = 1 - (stds[4] / means[4])
         
         # Activity type diversity
-        if "type" in df.columns:
-            activity_types = df["type"].value_counts()
+        if any("type" in a for a in activities):
+            activity_types = Counter(t for a in activities if (t := a.get("type")) is not None)
             features["activity_type_diversity"] = len(activity_types)
-            features["primary_activity_type"] = activity_types.index[0] if not activity_types.empty else "Unknown"
+            features["primary_activity_type"] = activity_types.most_common(1)[0][0] if activity_types else "Unknown"
         
         return features
     
@@ -298,98 +641,40 @@ class FeatureEngineer:
         composite_scores = {}
         
         try:
-            # Overall fitness score (0-100)
-            fitness_components = []
-            
-            # Cardiovascular fitness component
-            if "estimated_vo2_max" in features.get("performance_features", {}):
-                vo2_max = features["performance_features"]["estimated_vo2_max"]
-                cv_score = min(vo2_max / 70 * 100, 100)  # Normalize to 100, cap at 70 VO2 max
-                fitness_components.append(cv_score)
-            
-            # Power performance component
-            if "weighted_power_avg" in features.get("performance_features", {}):
-                power_avg = features["performance_features"]["weighted_power_avg"]
-                power_score = min(power_avg / 300 * 100, 100)  # Normalize to 100, cap at 300W
-                fitness_components.append(power_score)
-            
-            # Training consistency component
-            if "training_consistency" in features.get("training_features", {}):
-                consistency = features["training_features"]["training_consistency"]
-                consistency_score = consistency * 100
-                fitness_components.append(consistency_score)
-            
-            if fitness_components:
-                composite_scores["overall_fitness_score"] = np.mean(fitness_components)
-            
-            # Training quality score (0-100)
-            quality_components = []
-            
-            # Training frequency
-            if "activities_per_week" in features.get("training_features", {}):
-                freq = features["training_features"]["activities_per_week"]
-                freq_score = min(freq / 5 * 100, 100)  # Normalize to 5 activities per week
-                quality_components.append(freq_score)
-            
-            # Training intensity balance
-            if "high_intensity_ratio" in features.get("training_features", {}):
-                intensity_ratio = features["training_features"]["high_intensity_ratio"]
-                # Optimal ratio around 0.2 (20% high intensity)
-                intensity_score = 100 - abs(intensity_ratio - 0.2) * 500
-                intensity_score = max(0, min(100, intensity_score))
-                quality_components.append(intensity_score)
-            
-            if quality_components:
-                composite_scores["training_quality_score"] = np.mean(quality_components)
-            
-            # Performance trend score (-100 to +100)
-            trend_components = []
-            
-            if "power_trend_value" in features.get("performance_features", {}):
-                power_trend = features["performance_features"]["power_trend_value"]
-                trend_components.append(power_trend * 100)  # Convert to percentage
-            
-            if trend_components:
-                composite_scores["performance_trend_score"] = np.mean(trend_components)
-            
-            # Experience score (0-100)
-            experience_components = []
-            
-            if "account_age_years" in features.get("basic_features", {}):
-                age_years = features["basic_features"]["account_age_years"]
-                exp_score = min(age_years / 5 * 100, 100)  # Normalize to 5 years experience
-                experience_components.append(exp_score)
-            
-            if "total_activities" in features.get("training_features", {}):
-                total_activities = features["training_features"]["total_activities"]
-                activity_exp_score = min(total_activities / 500 * 100, 100)  # Normalize to 500 activities
-                experience_components.append(activity_exp_score)
-            
-            if experience_components:
-                composite_scores["experience_score"] = np.mean(experience_components)
+            perf = features.get("performance_features", {})
+            train = features.get("training_features", {})
+            basic = features.get("basic_features", {})
+            
+            # Missing inputs are passed as None so the cached helper always sees the same arity
+            scores = _composite_scores(
+                perf.get("estimated_vo2_max"),
+                perf.get("weighted_power_avg"),
+                train.get("training_consistency"),
+                train.get("activities_per_week"),
+                train.get("high_intensity_ratio"),
+                perf.get("power_trend_value"),
+                basic.get("account_age_years"),
+                train.get("total_activities")
+            )
+            for name, score in zip(_COMPOSITE_SCORE_NAMES, scores):
+                if score is not None:
+                    composite_scores[name] = score
             
         except Exception as e:
-            logger.error(f"Error calculating composite scores: {e}")
+            logger.error("Error calculating composite scores: %s", e)
             composite_scores["calculation_error"] = str(e)
         
         return composite_scores
     
-    def _encode_vo2_classification(self, classification: str) -> int:
+    @staticmethod
+    def _encode_vo2_classification(classification: str) -> int:
         """Encode VO2 max classification as numeric value."""
-        classification_map = {
-            "Elite": 5,
-            "Excellent": 4,
-            "Good": 3,
-            "Fair": 2,
-            "Poor": 1,
-            "Unknown": 0
-        }
-        return classification_map.get(classification, 0)
+        return _VO2_CLASSIFICATION_MAP.get(classification, 0)
     
     def _count_total_features(self, features: Dict[str, Any]) -> int:
         """Count total number of features extracted."""
         total = 0
         for category, feature_dict in features.items():
             if isinstance(feature_dict, dict):
-                total += len([k for k, v in feature_dict.items() if isinstance(v, (int, float))])
+                total += sum(1 for v in feature_dict.values() if isinstance(v, (int, float)))
         return total
\ No newline at end of file
@@ -11,132 +11,260 @@ This module handles calculations for:
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple, Union
 import math
+from bisect import bisect_left, bisect_right
 
 from ...config.logging_config import get_logger, log_function_entry, log_function_exit
 
 
 logger = get_logger(__name__)
 
+# VO2 max classification: lower bounds (ml/kg/min) of each label above "Poor"
+_VO2_MAX_THRESHOLDS = (35, 45, 55, 65)
+_VO2_MAX_LABELS = ("Poor", "Fair", "Good", "Excellent", "Elite")
+
+# Performance level: activity counts that must be exceeded to reach each label above "Recreational"
+_PERFORMANCE_LEVEL_THRESHOLDS = (20, 50)
+_PERFORMANCE_LEVEL_LABELS = ("Recreational", "Trained", "Well-trained")
+
 
 class FitnessMetricsAnalyzer:
     """Analyzes rider fitness metrics and trends."""
     
-    def calculate_fitness_metrics(self, activities: List[Dict], zones: Optional[Dict]) -> Dict[str, Any]:
+    # Stateless; no per-instance attribute dict needed
+    __slots__ = ()
+    
+    def analyze_all(self, activities: Union[List[Dict], pd.DataFrame, None], stats: Optional[Dict],
+                    zones: Optional[Dict]) -> Dict[str, Any]:
         """
-        Calculate comprehensive fitness metrics from activities.
+        Run every fitness analysis over a single shared activities frame.
+        
+        Builds the DataFrame, parses start dates and selects power activities
+        once, instead of once per analysis.
         
         Args:
-            activities: List of activity data
+            activities: List of activity data, or a frame from build_activities_frame
+            stats: Athlete statistics including power records
             zones: Power and heart rate zones data
             
         Returns:
-            Dictionary containing fitness metrics
+            Dictionary with fitness_metrics, power_analysis, training_load and vo2_analysis
         """
-        log_function_entry(logger, "calculate_fitness_metrics")
+        log_function_entry(logger, "analyze_all")
         
-        if not activities:
-            logger.warning("No activities provided for fitness metrics calculation")
-            return {}
+        df = self._as_frame(activities)
+        power_df = self._select_power_activities(df)
+        power_watts = self._power_watts(power_df)
         
-        # Convert to DataFrame for easier analysis
-        df = pd.DataFrame(activities)
-        
-        # Basic activity frequency and volume
-        metrics = {
-            "activity_frequency": self._calculate_activity_frequency(df),
-            "training_hours": self._calculate_weekly_training_hours(df),
-            "fitness_trend": self._calculate_fitness_trend(df),
-            "consistency": self._calculate_training_consistency(df),
-            "intensity_distribution": self._calculate_intensity_distribution(df, zones),
-            "recovery_metrics": self._calculate_recovery_metrics(df)
+        results = {
+            "fitness_metrics": self._fitness_metrics_from_frame(df, zones, power_watts),
+            "power_analysis": self._power_metrics_from_frame(stats, df, power_df),
+            "training_load": self._training_load_from_frame(df, power_watts),
+            "vo2_analysis": self._vo2_max_from_power(stats, power_watts.max() if power_watts is not None else None)
         }
         
-        log_function_exit(logger, "calculate_fitness_metrics")
-        return metrics
+        log_function_exit(logger, "analyze_all")
+        return results
+    
+    def calculate_fitness_metrics(self, activities: Union[List[Dict], pd.DataFrame, None],
+                                  zones: Optional[Dict]) -> Dict[str, Any]:
+        """
+        Calculate comprehensive fitness metrics from activities.
+        
+        Args:
+            activities: List of activity data, or a frame from build_activities_frame
+            zones: Power and heart rate zones data
+            
+        Returns:
+            Dictionary containing fitness metrics
+        """
+        df = self._as_frame(activities)
+        return self._fitness_metrics_from_frame(df, zones, self._power_watts(self._select_power_activities(df)))
     
-    def analyze_power_metrics(self, stats: Optional[Dict], activities: List[Dict]) -> Dict[str, Any]:
+    def analyze_power_metrics(self, stats: Optional[Dict],
+                              activities: Union[List[Dict], pd.DataFrame, None]) -> Dict[str, Any]:
         """
         Analyze power-related metrics and performance.
         
         Args:
             stats: Athlete statistics including power records
-            activities: Recent activities data
+            activities: Recent activities data, or a frame from build_activities_frame
             
         Returns:
             Dictionary containing power analysis
         """
-        log_function_entry(logger, "analyze_power_metrics")
-        
-        power_analysis = {}
-        
-        if stats and 'all_ride_totals' in stats:
-            # Power records analysis
-            power_analysis['power_records'] = self._extract_power_records(stats)
-            power_analysis['critical_power_curve'] = self._analyze_critical_power_curve(stats, activities)
-            power_analysis['performance_level'] = self._classify_performance_level(power_analysis.get('critical_power_curve', {}))
-        
-        # Training power trends from activities
-        if activities:
-            df = pd.DataFrame(activities)
-            power_df = df[df['average_watts'].notna() & (df['average_watts'] > 0)]
-            
-            if not power_df.empty:
-                power_analysis['power_trend'] = self._calculate_power_trend(power_df)
-                power_analysis['weighted_power_avg'] = self._calculate_weighted_power_average(power_df)
-        
-        log_function_exit(logger, "analyze_power_metrics")
-        return power_analysis
+        df = self._as_frame(activities)
+        return self._power_metrics_from_frame(stats, df, self._select_power_activities(df))
     
-    def analyze_training_load(self, activities: List[Dict]) -> Dict[str, Any]:
+    def analyze_training_load(self, activities: Union[List[Dict], pd.DataFrame, None]) -> Dict[str, Any]:
         """
         Analyze training load and stress metrics.
         
         Args:
-            activities: List of activity data
+            activities: List of activity data, or a frame from build_activities_frame
             
         Returns:
             Dictionary containing training load analysis
         """
-        log_function_entry(logger, "analyze_training_load")
+        df = self._as_frame(activities)
+        return self._training_load_from_frame(df, self._power_watts(self._select_power_activities(df)))
+    
+    def estimate_vo2_max(self, stats: Optional[Dict],
+                         activities: Union[List[Dict], pd.DataFrame, None]) -> Dict[str, Any]:
+        """
+        Estimate VO2 max from power data and activities.
         
+        Args:
+            stats: Athlete statistics
+            activities: Recent activities, or a frame from build_activities_frame
+            
+        Returns:
+            Dictionary containing VO2 max estimation
+        """
+        if isinstance(activities, pd.DataFrame):
+            power_watts = self._power_watts(self._select_power_activities(self._as_frame(activities)))
+            max_power = power_watts.max() if power_watts is not None else None
+        else:
+            # Only the peak power is needed, so scan the list instead of building a frame
+            max_power = max(
+                (watts for a in activities or () if (watts := a.get('average_watts')) is not None and watts > 0),
+                default=None
+            )
+        return self._vo2_max_from_power(stats, max_power)
+    
+    def build_activities_frame(self, activities: List[Dict]) -> Optional[pd.DataFrame]:
+        """Convert activities to a DataFrame with parsed UTC start dates, or None if there are none."""
         if not activities:
-            return {}
+            return None
         
         df = pd.DataFrame(activities)
+        if 'start_date' in df.columns:
+            # Parsed once here; every helper reads the typed column as-is
+            df['start_date'] = pd.to_datetime(df['start_date'], utc=True, format='ISO8601')
+        return df
+    
+    def _as_frame(self, activities: Union[List[Dict], pd.DataFrame, None]) -> Optional[pd.DataFrame]:
+        """Use a frame from build_activities_frame as-is, or build one from an activity list."""
+        if isinstance(activities, pd.DataFrame):
+            return activities if not activities.empty else None
+        return self.build_activities_frame(activities)
+    
+    def _select_power_activities(self, df: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+        """Select activities with recorded power, or None if there are none."""
+        if df is None or 'average_watts' not in df.columns:
+            return None
         
-        training_load = {
-            "weekly_hours": self._calculate_weekly_training_hours(df),
-            "training_intensity": self._calculate_training_intensity(df),
-            "stress_balance": self._calculate_training_stress_balance(df),
-            "peak_period": self._identify_peak_training_period(df)
-        }
-        
-        log_function_exit(logger, "analyze_training_load")
-        return training_load
+        power_df = df[df['average_watts'].notna() & (df['average_watts'] > 0)]
+        return power_df if not power_df.empty else None
+    
+    def _power_watts(self, power_df: Optional[pd.DataFrame]) -> Optional[np.ndarray]:
+        """Average watts of the selected power activities as a float array, or None."""
+        return power_df['average_watts'].to_numpy(dtype=np.float64) if power_df is not None else None
     
-    def estimate_vo2_max(self, stats: Optional[Dict], activities: List[Dict]) -> Dict[str, Any]:
+    def _date_span_days(self, df: pd.DataFrame) -> float:
+        """Whole days between the first and last dated activity, NaN if none are dated."""
+        dates = df['start_date'].values
+        dates = dates[~np.isnat(dates)]
+        if dates.size == 0:
+            return np.nan
+        return int((dates.max() - dates.min()) // np.timedelta64(1, 'D'))
+    
+    def _week_numbers(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Estimate VO2 max from power data and activities.
+        Number the week of each dated activity without building periods.
         
         Args:
-            stats: Athlete statistics
-            activities: Recent activities
+            df: Activities frame with parsed start dates
             
         Returns:
-            Dictionary containing VO2 max estimation
+            Tuple of (Monday-based week numbers of the dated rows, mask of dated rows)
         """
-        log_function_entry(logger, "estimate_vo2_max")
+        dates = df['start_date'].values
+        dated = ~np.isnat(dates)
+        days = dates[dated].astype('datetime64[D]').astype(np.int64)
+        # The Unix epoch fell on a Thursday; shift so weeks run Monday to Sunday like to_period('W')
+        return (days + 3) // 7, dated
+    
+    def _week_label(self, week: int) -> str:
+        """Label a week number like a weekly period, e.g. '2024-01-01/2024-01-07'."""
+        monday = np.datetime64(int(week) * 7 - 3, 'D')
+        return f"{monday}/{monday + 6}"
+    
+    def _weekly_activity_counts(self, df: pd.DataFrame) -> np.ndarray:
+        """Activity counts of each week that has activities, oldest week first."""
+        weeks, _ = self._week_numbers(df)
+        if weeks.size == 0:
+            return weeks
+        counts = np.bincount(weeks - weeks.min())
+        return counts[counts > 0]
+    
+    def _fitness_metrics_from_frame(self, df: Optional[pd.DataFrame], zones: Optional[Dict],
+                                    power_watts: Optional[np.ndarray]) -> Dict[str, Any]:
+        """Calculate fitness metrics from a prepared activities frame and its valid power values."""
+        if df is None:
+            logger.warning("No activities provided for fitness metrics calculation")
+            return {}
+        
+        # Basic activity frequency and volume share one pass over the dates for their span
+        days_span = self._date_span_days(df)
+        return {
+            "activity_frequency": self._calculate_activity_frequency(df, days_span),
+            "training_hours": self._calculate_weekly_training_hours(df, days_span),
+            "fitness_trend": self._calculate_fitness_trend(df),
+            "consistency": self._calculate_training_consistency(df),
+            "intensity_distribution": self._calculate_intensity_distribution(df, zones, power_watts),
+            "recovery_metrics": self._calculate_recovery_metrics(df)
+        }
+    
+    def _power_metrics_from_frame(self, stats: Optional[Dict], df: Optional[pd.DataFrame],
+                                  power_df: Optional[pd.DataFrame]) -> Dict[str, Any]:
+        """Analyze power metrics from stats and the prepared power activities."""
+        power_analysis = {}
+        
+        if stats and 'all_ride_totals' in stats:
+            # Power records analysis
+            power_analysis['power_records'] = self._extract_power_records(stats)
+            power_analysis['critical_power_curve'] = self._analyze_critical_power_curve(stats, df)
+            power_analysis['performance_level'] = self._classify_performance_level(power_analysis.get('critical_power_curve', {}))
+        
+        # Training power trends from activities
+        if power_df is not None:
+            power_analysis['power_trend'] = self._calculate_power_trend(power_df)
+            power_analysis['weighted_power_avg'] = self._calculate_weighted_power_average(power_df)
+        
+        return power_analysis
+    
+    def _training_load_from_frame(self, df: Optional[pd.DataFrame],
+                                  power_watts: Optional[np.ndarray]) -> Dict[str, Any]:
+        """Analyze training load from a prepared activities frame and its valid power values."""
+        if df is None:
+            return {}
         
+        return {
+            "weekly_hours": self._calculate_weekly_training_hours(df, self._date_span_days(df)),
+            "training_intensity": self._calculate_training_intensity(df, power_watts),
+            "stress_balance": self._calculate_training_stress_balance(df),
+            "peak_period": self._identify_peak_training_period(df)
+        }
+    
+    def _vo2_max_from_power(self, stats: Optional[Dict], max_power: Optional[float]) -> Dict[str, Any]:
+        """Estimate VO2 max from stats or the highest average power of recent activities."""
         vo2_analysis = {}
         
         # Method 1: From 20-minute power record (if available)
         if stats and 'all_ride_totals' in stats:
             power_20min = None
-            for pr in stats.get('biggest_ride_distance', {}).get('power', []):
-                if '20' in str(pr.get('duration', 0)):  # Approximate 20-minute effort
-                    power_20min = pr.get('value')
+            power_records = (stats.get('biggest_ride_distance') or {}).get('power') or ()
+            for pr in power_records:
+                get = pr.get
+                # Records whose duration is not a number (e.g. "20m") are skipped
+                try:
+                    duration = float(get('duration'))
+                except (TypeError, ValueError):
+                    continue
+                if 1150 <= duration <= 1250:  # Approximate 20-minute effort
+                    power_20min = get('value')
                     break
             
             if power_20min:
@@ -151,22 +279,16 @@ class FitnessMetricsAnalyzer:
                 vo2_analysis['method'] = '20-minute power'
         
         # Method 2: From recent activity power data
-        if activities and not vo2_analysis:
-            df = pd.DataFrame(activities)
-            power_df = df[df['average_watts'].notna() & (df['average_watts'] > 0)]
+        if max_power is not None and not vo2_analysis:
+            # Use highest sustained power efforts
+            estimated_weight = 75
+            power_per_kg = max_power / estimated_weight
+            vo2_max_estimated = 10.8 * power_per_kg + 7
             
-            if not power_df.empty:
-                # Use highest sustained power efforts
-                max_power = power_df['average_watts'].max()
-                estimated_weight = 75
-                power_per_kg = max_power / estimated_weight
-                vo2_max_estimated = 10.8 * power_per_kg + 7
-                
-                vo2_analysis['estimated_vo2_max'] = vo2_max_estimated
-                vo2_analysis['classification'] = self._classify_vo2_max(vo2_max_estimated)
-                vo2_analysis['method'] = 'activity power average'
+            vo2_analysis['estimated_vo2_max'] = vo2_max_estimated
+            vo2_analysis['classification'] = self._classify_vo2_max(vo2_max_estimated)
+            vo2_analysis['method'] = 'activity power average'
         
-        log_function_exit(logger, "estimate_vo2_max")
         return vo2_analysis
     
     def _extract_power_records(self, stats: Dict) -> Dict[str, Any]:
@@ -185,12 +307,13 @@ class FitnessMetricsAnalyzer:
             
         return power_records
     
-    def _analyze_critical_power_curve(self, stats: Optional[Dict], activities: List[Dict]) -> Dict[str, Any]:
+    def _analyze_critical_power_curve(self, stats: Optional[Dict], df: Optional[pd.DataFrame]) -> Dict[str, Any]:
         """Analyze critical power curve from available data."""
         # Simplified implementation - in real app would need more sophisticated analysis
+        activity_count = len(df) if df is not None else 0
         return {
-            "analysis_available": bool(stats and activities),
-            "data_points": len(activities) if activities else 0
+            "analysis_available": bool(stats) and activity_count > 0,
+            "data_points": activity_count
         }
     
     def _classify_performance_level(self, cp_curve: Dict[str, Any]) -> str:
@@ -200,48 +323,30 @@ class FitnessMetricsAnalyzer:
         
         # Simplified classification - would need actual power curve analysis
         data_points = cp_curve.get("data_points", 0)
-        if data_points > 50:
-            return "Well-trained"
-        elif data_points > 20:
-            return "Trained"
-        else:
-            return "Recreational"
+        return _PERFORMANCE_LEVEL_LABELS[bisect_left(_PERFORMANCE_LEVEL_THRESHOLDS, data_points)]
     
     def _classify_vo2_max(self, vo2_max: float) -> str:
         """Classify VO2 max into performance categories."""
-        if vo2_max >= 65:
-            return "Elite"
-        elif vo2_max >= 55:
-            return "Excellent"
-        elif vo2_max >= 45:
-            return "Good"
-        elif vo2_max >= 35:
-            return "Fair"
-        else:
-            return "Poor"
+        return _VO2_MAX_LABELS[bisect_right(_VO2_MAX_THRESHOLDS, vo2_max)]
     
-    def _calculate_activity_frequency(self, df: pd.DataFrame) -> Dict[str, float]:
-        """Calculate activity frequency metrics."""
+    def _calculate_activity_frequency(self, df: pd.DataFrame, days_span: float) -> Dict[str, float]:
+        """Calculate activity frequency metrics over a span from _date_span_days."""
         if df.empty:
             return {}
         
-        df['start_date'] = pd.to_datetime(df['start_date'])
-        days_span = (df['start_date'].max() - df['start_date'].min()).days
-        
         return {
             "activities_per_week": len(df) / max(days_span / 7, 1),
             "total_activities": len(df),
             "days_analyzed": days_span
         }
     
-    def _calculate_weekly_training_hours(self, df: pd.DataFrame) -> Dict[str, float]:
-        """Calculate weekly training hours."""
+    def _calculate_weekly_training_hours(self, df: pd.DataFrame, days_span: float) -> Dict[str, float]:
+        """Calculate weekly training hours over a span from _date_span_days."""
         if df.empty or 'moving_time' not in df.columns:
             return {}
         
         total_hours = df['moving_time'].sum() / 3600  # Convert seconds to hours
-        df['start_date'] = pd.to_datetime(df['start_date'])
-        weeks = (df['start_date'].max() - df['start_date'].min()).days / 7
+        weeks = days_span / 7
         
         return {
             "total_hours": total_hours,
@@ -254,19 +359,15 @@ class FitnessMetricsAnalyzer:
         if df.empty:
             return {}
         
-        df['start_date'] = pd.to_datetime(df['start_date'])
-        df_sorted = df.sort_values('start_date')
-        
         # Simple trend based on activity frequency and intensity
-        weekly_groups = df_sorted.groupby(df_sorted['start_date'].dt.to_period('W'))
-        weekly_counts = weekly_groups.size()
+        weekly_counts = self._weekly_activity_counts(df)
         
         if len(weekly_counts) < 2:
             return {"trend": "insufficient_data"}
         
         # Calculate trend (positive = improving, negative = declining)
-        recent_avg = weekly_counts.tail(4).mean()
-        earlier_avg = weekly_counts.head(4).mean()
+        recent_avg = weekly_counts[-4:].mean()
+        earlier_avg = weekly_counts[:4].mean()
         trend = (recent_avg - earlier_avg) / max(earlier_avg, 1)
         
         return {
@@ -281,16 +382,14 @@ class FitnessMetricsAnalyzer:
         if df.empty:
             return 0.0
         
-        df['start_date'] = pd.to_datetime(df['start_date'])
-        weekly_groups = df.groupby(df['start_date'].dt.to_period('W'))
-        weekly_counts = weekly_groups.size()
+        weekly_counts = self._weekly_activity_counts(df)
         
         if len(weekly_counts) < 2:
             return 0.0
         
         # Consistency based on standard deviation of weekly activity counts
         mean_weekly = weekly_counts.mean()
-        std_weekly = weekly_counts.std()
+        std_weekly = weekly_counts.std(ddof=1)
         
         if mean_weekly == 0:
             return 0.0
@@ -301,39 +400,35 @@ class FitnessMetricsAnalyzer:
         
         return min(consistency, 1.0)
     
-    def _calculate_intensity_distribution(self, df: pd.DataFrame, zones: Optional[Dict]) -> Dict[str, Any]:
+    def _calculate_intensity_distribution(self, df: pd.DataFrame, zones: Optional[Dict],
+                                          power_watts: Optional[np.ndarray]) -> Dict[str, Any]:
         """Calculate training intensity distribution."""
-        if df.empty:
+        if df.empty or power_watts is None:
             return {}
         
         # Simple intensity calculation based on average power
-        if 'average_watts' in df.columns:
-            power_df = df[df['average_watts'].notna() & (df['average_watts'] > 0)]
-            
-            if not power_df.empty:
-                power_mean = power_df['average_watts'].mean()
-                power_std = power_df['average_watts'].std()
-                
-                return {
-                    "average_power": power_mean,
-                    "power_variability": power_std,
-                    "high_intensity_sessions": len(power_df[power_df['average_watts'] > power_mean + power_std]),
-                    "total_power_sessions": len(power_df)
-                }
+        power_mean = power_watts.mean()
+        power_std = power_watts.std(ddof=1) if power_watts.size > 1 else np.nan
         
-        return {}
+        return {
+            "average_power": power_mean,
+            "power_variability": power_std,
+            "high_intensity_sessions": int(np.count_nonzero(power_watts > power_mean + power_std)),
+            "total_power_sessions": power_watts.size
+        }
     
     def _calculate_power_trend(self, power_df: pd.DataFrame) -> Dict[str, Any]:
         """Calculate power trend over time."""
         if power_df.empty:
             return {}
         
-        power_df['start_date'] = pd.to_datetime(power_df['start_date'])
-        power_df_sorted = power_df.sort_values('start_date')
+        # Only the watts are needed in date order, so sort indices rather than the frame
+        order = np.argsort(power_df['start_date'].values, kind='stable')
+        watts_sorted = power_df['average_watts'].to_numpy(dtype=np.float64)[order]
         
         # Simple trend calculation
-        recent_power = power_df_sorted.tail(10)['average_watts'].mean()
-        earlier_power = power_df_sorted.head(10)['average_watts'].mean()
+        recent_power = watts_sorted[-10:].mean()
+        earlier_power = watts_sorted[:10].mean()
         
         trend = (recent_power - earlier_power) / max(earlier_power, 1)
         
@@ -349,20 +444,25 @@ class FitnessMetricsAnalyzer:
         if power_df.empty:
             return 0.0
         
-        # Weight by recency (more recent activities have higher weight)
-        power_df['start_date'] = pd.to_datetime(power_df['start_date'])
-        max_date = power_df['start_date'].max()
-        power_df['days_ago'] = (max_date - power_df['start_date']).dt.days
+        # Undated activities carry no recency weight
+        dates = power_df['start_date'].values
+        dated = ~np.isnat(dates)
+        if not dated.any():
+            return 0.0
+        dates = dates[dated]
+        
+        # Weight by recency (more recent activities have higher weight), in whole days
+        days_ago = (dates.max() - dates) // np.timedelta64(1, 'D')
         
         # Exponential decay weight (half-life of 30 days)
-        power_df['weight'] = np.exp(-power_df['days_ago'] / 30)
+        weights = np.exp(-days_ago / 30)
         
-        weighted_sum = (power_df['average_watts'] * power_df['weight']).sum()
-        weight_sum = power_df['weight'].sum()
+        weighted_sum = power_df['average_watts'].to_numpy(dtype=np.float64)[dated] @ weights
+        weight_sum = weights.sum()
         
         return weighted_sum / weight_sum if weight_sum > 0 else 0.0
     
-    def _calculate_training_intensity(self, df: pd.DataFrame) -> float:
+    def _calculate_training_intensity(self, df: pd.DataFrame, power_watts: Optional[np.ndarray]) -> float:
         """Calculate overall training intensity score."""
         if df.empty:
             return 0.0
@@ -370,17 +470,16 @@ class FitnessMetricsAnalyzer:
         # Simple intensity based on average power and heart rate
         intensity_score = 0.0
         
-        if 'average_watts' in df.columns:
-            power_df = df[df['average_watts'].notna() & (df['average_watts'] > 0)]
-            if not power_df.empty:
-                # Normalize power intensity (assuming 200W as moderate)
-                intensity_score += (power_df['average_watts'].mean() / 200) * 0.6
+        if power_watts is not None:
+            # Normalize power intensity (assuming 200W as moderate)
+            intensity_score += (power_watts.mean() / 200) * 0.6
         
         if 'average_heartrate' in df.columns:
-            hr_df = df[df['average_heartrate'].notna() & (df['average_heartrate'] > 0)]
-            if not hr_df.empty:
+            heart_rates = df['average_heartrate'].to_numpy(dtype=np.float64)
+            heart_rates = heart_rates[heart_rates > 0]
+            if heart_rates.size:
                 # Normalize HR intensity (assuming 150 bpm as moderate)
-                intensity_score += (hr_df['average_heartrate'].mean() / 150) * 0.4
+                intensity_score += (heart_rates.mean() / 150) * 0.4
         
         return min(intensity_score, 2.0)  # Cap at 2.0 for very high intensity
     
@@ -389,42 +488,42 @@ class FitnessMetricsAnalyzer:
         if df.empty:
             return {}
         
-        df['start_date'] = pd.to_datetime(df['start_date'])
-        df_sorted = df.sort_values('start_date')
+        # Calculate time between consecutive dated activities, in hours
+        dates = df['start_date'].values
+        dates = np.sort(dates[~np.isnat(dates)])
+        time_diffs = np.diff(dates) / np.timedelta64(1, 'h')
         
-        # Calculate time between activities
-        time_diffs = df_sorted['start_date'].diff().dt.total_seconds() / 3600  # Hours
+        if time_diffs.size == 0:
+            # A single dated activity has no gaps to measure
+            return {
+                "average_recovery_hours": np.nan,
+                "min_recovery_hours": np.nan,
+                "max_recovery_hours": np.nan
+            }
         
         return {
-            "average_recovery_hours": time_diffs.mean() if not time_diffs.empty else 0,
-            "min_recovery_hours": time_diffs.min() if not time_diffs.empty else 0,
-            "max_recovery_hours": time_diffs.max() if not time_diffs.empty else 0
+            "average_recovery_hours": time_diffs.mean(),
+            "min_recovery_hours": time_diffs.min(),
+            "max_recovery_hours": time_diffs.max()
         }
     
     def _calculate_training_stress_balance(self, df: pd.DataFrame) -> Dict[str, float]:
         """Calculate training stress balance metrics."""
-        if df.empty:
+        if df.empty or 'moving_time' not in df.columns:
             return {}
         
-        # Simplified TSB calculation based on activity frequency and intensity
-        df['start_date'] = pd.to_datetime(df['start_date'])
-        
-        # Group by week and calculate weekly stress
-        weekly_groups = df.groupby(df['start_date'].dt.to_period('W'))
-        weekly_stress = []
-        
-        for week, group in weekly_groups:
-            if 'moving_time' in group.columns:
-                hours = group['moving_time'].sum() / 3600
-                stress = hours * 10  # Simplified stress calculation
-                weekly_stress.append(stress)
+        # Simplified TSB calculation: weekly stress is 10 per training hour,
+        # so each week's moving seconds are divided by 3600 / 10
+        weeks, dated = self._week_numbers(df)
+        weekly_time = pd.Series(df['moving_time'].to_numpy()[dated]).groupby(weeks).sum()
+        weekly_stress = weekly_time.to_numpy() / 360.0
         
         if len(weekly_stress) < 2:
             return {}
         
-        # Calculate recent vs. historical stress
-        recent_stress = np.mean(weekly_stress[-4:]) if len(weekly_stress) >= 4 else np.mean(weekly_stress)
-        historical_stress = np.mean(weekly_stress[:-4]) if len(weekly_stress) > 4 else recent_stress
+        # Calculate recent vs. historical stress (the last four weeks, or all of them if fewer)
+        recent_stress = weekly_stress[-4:].mean()
+        historical_stress = weekly_stress[:-4].mean() if len(weekly_stress) > 4 else recent_stress
         
         return {
             "recent_weekly_stress": recent_stress,
@@ -437,20 +536,26 @@ class FitnessMetricsAnalyzer:
         if df.empty:
             return {}
         
-        df['start_date'] = pd.to_datetime(df['start_date'])
-        
-        # Group by week and find peak volume
-        weekly_groups = df.groupby(df['start_date'].dt.to_period('W'))
-        weekly_hours = weekly_groups['moving_time'].sum() / 3600 if 'moving_time' in df.columns else weekly_groups.size()
-        
-        if weekly_hours.empty:
+        # Bin by week number and find peak volume
+        has_moving_time = 'moving_time' in df.columns
+        weeks, dated = self._week_numbers(df)
+        if weeks.size == 0:
             return {}
         
-        peak_week = weekly_hours.idxmax()
-        peak_value = weekly_hours.max()
+        first_week = weeks.min()
+        if has_moving_time:
+            moving_time = np.nan_to_num(df['moving_time'].to_numpy(dtype=np.float64)[dated])
+            weekly_totals = np.bincount(weeks - first_week, weights=moving_time) / 3600
+        else:
+            weekly_totals = np.bincount(weeks - first_week)
+        
+        # Weeks without activities total zero and the first week always has one,
+        # so argmax lands on the earliest week with the highest volume
+        peak_index = weekly_totals.argmax()
+        peak_value = weekly_totals[peak_index]
         
         return {
-            "peak_week": str(peak_week),
+            "peak_week": self._week_label(first_week + peak_index),
             "peak_value": peak_value,
-            "metric": "hours" if 'moving_time' in df.columns else "activities"
+            "metric": "hours" if has_moving_time else "activities"
         }
\ No newline at end of file
@@ -16,8 +16,8 @@ from ..config.logging_config import get_logger
 logger = get_logger(__name__)
 
 
-class RiderDataProcessor:
-    """Legacy wrapper for the refactored rider data processor."""
+class RiderDataProcessor(NewRiderDataProcessor):
+    """Legacy entry point for the refactored rider data processor."""
     
     def __init__(self, oauth_client):
         """
@@ -27,8 +27,4 @@ class RiderDataProcessor:
             oauth_client: StravaOAuth instance for API calls
         """
         logger.info("Initializing refactored RiderDataProcessor")
-        self._processor = NewRiderDataProcessor(oauth_client)
-    
-    def __getattr__(self, name):
-        """Delegate all method calls to the new processor for backwards compatibility."""
-        return getattr(self._processor, name)
\ No newline at end of file
+        super().__init__(oauth_client)
@@ -0,0 +1,36 @@
+"""
+JSON serialization shared by the KOMpass storage backends.
+
+Uses orjson when it is installed and falls back to the stdlib json module.
+Note that orjson writes NaN and Infinity as null, so such values come back
+as None after a round trip, where the stdlib wrote and read back NaN.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Match the stdlib output (2-space indent, string keys) and accept NumPy values
+_ORJSON_DUMP_OPTIONS = (
+    orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    if orjson is not None else 0
+)
+
+
+def dump_json_bytes(data: Any) -> bytes:
+    """Serialize data to UTF-8 encoded JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(data, option=_ORJSON_DUMP_OPTIONS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def load_json_bytes(content: bytes) -> Any:
+    """Parse UTF-8 encoded JSON bytes."""
+    if orjson is not None:
+        # orjson parses raw bytes directly and is several times faster
+        return orjson.loads(content)
+    return json.loads(content.decode('utf-8'))
@@ -4,13 +4,13 @@ Handles Amazon S3 operations with user data isolation and free tier compliance.
 """
 
 import boto3
-import json
 import os
 from datetime import datetime
 from typing import Dict, List, Optional, Any, BinaryIO
 from botocore.exceptions import ClientError, NoCredentialsError
 
 from ..config.logging_config import get_logger, log_function_entry, log_function_exit
+from ._json import dump_json_bytes, load_json_bytes
 
 logger = get_logger(__name__)
 
@@ -120,7 +120,7 @@ class S3StorageBackend:
             
             # Convert data to appropriate format
             if isinstance(data, dict):
-                content = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+                content = dump_json_bytes(data)
                 content_type = 'application/json'
             elif isinstance(data, bytes):
                 content = data
@@ -196,7 +196,7 @@ class S3StorageBackend:
             
             # Parse content based on type
             if content_type == 'application/json':
-                data = json.loads(content.decode('utf-8'))
+                data = load_json_bytes(content)
             elif content_type == 'text/plain':
                 data = content.decode('utf-8')
             else:
@@ -219,29 +219,31 @@ class S3StorageBackend:
             log_function_exit(logger, "load_file", f"success=False, error={str(e)}")
             return None
     
-    def list_files(self, user_id: Optional[str], data_type: str) -> List[Dict[str, Any]]:
+    def list_files(self, user_id: Optional[str], data_type: str, prefix: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         List files in S3 for a user and data type.
         
         Args:
             user_id: User ID (None for global data)
             data_type: Type of data (routes, fitness, models, training_data)
+            prefix: Only list files whose name starts with this prefix
             
         Returns:
             List of file information
         """
-        log_function_entry(logger, "list_files", user_id=user_id, data_type=data_type)
+        log_function_entry(logger, "list_files", user_id=user_id, data_type=data_type, prefix=prefix)
         
         if not self.is_available():
             logger.error("S3 storage not available")
             return []
         
         try:
-            prefix = self._build_key(user_id, data_type, "")
+            # Filename prefix filtering is pushed down to S3
+            key_prefix = self._build_key(user_id, data_type, prefix or "")
             
             response = self.s3_client.list_objects_v2(
                 Bucket=self.config.bucket_name,
-                Prefix=prefix
+                Prefix=key_prefix
             )
             
             files = []
@@ -257,7 +259,7 @@ class S3StorageBackend:
                         'size_mb': round(obj['Size'] / (1024 * 1024), 2)
                     })
             
-            logger.debug(f"Listed {len(files)} files from S3 prefix: {prefix}")
+            logger.debug(f"Listed {len(files)} files from S3 prefix: {key_prefix}")
             log_function_exit(logger, "list_files", f"success=True, count=len(files")
             return files
             
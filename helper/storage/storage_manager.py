@@ -3,7 +3,6 @@ Storage Manager for KOMpass.
 Provides unified interface for local and S3 storage backends.
 """
 
-import json
 import os
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Union
@@ -12,6 +11,7 @@ import hashlib
 from ..config.config import get_config
 from ..config.logging_config import get_logger, log_function_entry, log_function_exit
 from .s3_storage import S3StorageBackend
+from ._json import dump_json_bytes, load_json_bytes
 
 logger = get_logger(__name__)
 
@@ -127,8 +127,8 @@ class StorageManager:
             os.makedirs(os.path.dirname(filepath), exist_ok=True)
             
             if isinstance(data, dict):
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
+                with open(filepath, 'wb') as f:
+                    f.write(dump_json_bytes(data))
             elif isinstance(data, bytes):
                 with open(filepath, 'wb') as f:
                     f.write(data)
@@ -191,8 +191,12 @@ class StorageManager:
             
             # Determine file type and load appropriately
             if filename.endswith('.json'):
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                with open(filepath, 'rb') as f:
+                    return load_json_bytes(f.read())
+            elif filename.endswith(('.joblib', '.parquet')):
+                # Serialized models and columnar datasets are always binary
+                with open(filepath, 'rb') as f:
+                    return f.read()
             else:
                 # Try to read as text first, fallback to bytes
                 try:
@@ -206,28 +210,29 @@ class StorageManager:
             logger.error(f"Failed to load local file: {e}")
             return None
     
-    def list_user_data(self, user_id: str, data_type: str) -> List[Dict[str, Any]]:
+    def list_user_data(self, user_id: str, data_type: str, prefix: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         List data files for a user and data type.
         
         Args:
             user_id: User ID
             data_type: Type of data (routes, fitness, models, training_data)
+            prefix: Only list files whose name starts with this prefix
             
         Returns:
             List of file information
         """
-        log_function_entry(logger, "list_user_data", user_id=user_id, data_type=data_type)
+        log_function_entry(logger, "list_user_data", user_id=user_id, data_type=data_type, prefix=prefix)
         
         files = []
         
         # Get from S3 if enabled
         if self.is_s3_enabled():
-            files = self.s3_backend.list_files(user_id, data_type)
+            files = self.s3_backend.list_files(user_id, data_type, prefix)
             logger.debug(f"Listed {len(files)} files from S3")
         
         # Merge with local files if S3 not available or as backup
-        local_files = self._list_local_files(user_id, data_type)
+        local_files = self._list_local_files(user_id, data_type, prefix)
         
         # Merge and deduplicate
         file_dict = {f['filename']: f for f in files}
@@ -241,8 +246,9 @@ class StorageManager:
         log_function_exit(logger, "list_user_data", f"success=True, count={len(result)}")
         return result
     
-    def _list_local_files(self, user_id: Optional[str], data_type: str) -> List[Dict[str, Any]]:
-        """List files from local storage."""
+    def _list_local_files(self, user_id: Optional[str], data_type: str,
+                          prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List files from local storage, optionally restricted to a filename prefix."""
         files = []
         try:
             if user_id:
@@ -251,18 +257,20 @@ class StorageManager:
                 directory = os.path.join(self.local_data_dir, data_type)
             
             if os.path.exists(directory):
-                for filename in os.listdir(directory):
-                    filepath = os.path.join(directory, filename)
-                    if os.path.isfile(filepath):
-                        stat = os.stat(filepath)
-                        files.append({
-                            'filename': filename,
-                            'filepath': filepath,
-                            'size_bytes': stat.st_size,
-                            'size_mb': round(stat.st_size / (1024 * 1024), 2),
-                            'last_modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                            'backend': 'local'
-                        })
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if prefix and not entry.name.startswith(prefix):
+                            continue
+                        if entry.is_file():
+                            stat = entry.stat()
+                            files.append({
+                                'filename': entry.name,
+                                'filepath': entry.path,
+                                'size_bytes': stat.st_size,
+                                'size_mb': round(stat.st_size / (1024 * 1024), 2),
+                                'last_modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                                'backend': 'local'
+                            })
         except Exception as e:
             logger.error(f"Failed to list local files: {e}")
         
@@ -97,6 +97,106 @@ def test_model_transparency():
         print(f"❌ Model transparency test failed: {e}")
         return False
 
+def test_speed_prediction_batch():
+    """Test batch predictions match per-route predictions for model and rule paths."""
+    import numpy as np
+    import pandas as pd
+    from sklearn.linear_model import LinearRegression
+    from helper.ml.speed_predictor import SpeedPredictor
+    
+    rider = {'ftp': 260, 'weight_kg': 72, 'training_hours_per_week': 9}
+    routes_df = pd.DataFrame([
+        {'distance_km': 80, 'total_elevation_gain': 900, 'avg_gradient_percent': 1.5, 'max_gradient_percent': 9},
+        {'distance_km': 35, 'total_elevation_gain': np.nan, 'avg_gradient_percent': 4.0, 'max_gradient_percent': np.nan},
+        {'distance_km': np.nan, 'total_elevation_gain': 200, 'avg_gradient_percent': np.nan, 'max_gradient_percent': 3}
+    ])
+    # Route dicts as a single-route caller would pass them, without the missing fields
+    routes = [{k: v for k, v in route.items() if pd.notna(v)} for route in routes_df.to_dict('records')]
+    
+    predictor = SpeedPredictor()
+    predictor.models = {}
+    predictor._confidence = {}
+    
+    # Rule-based fallback when no model is loaded
+    batch = predictor.predict_speed_batch(rider, routes_df, 'zone2')
+    single = [predictor.predict_speed(rider, route, 'zone2')['speed_kmh'] for route in routes]
+    assert np.allclose(batch, single), f"Rule-based batch {batch} != per-route {single}"
+    
+    # Model path with a small fitted model
+    rng = np.random.RandomState(0)
+    X = rng.uniform(1, 300, size=(40, 12)).astype(np.float32)
+    model = LinearRegression().fit(X, 20 + X[:, 0] / 20 + X[:, 6] / 10)
+    predictor.models = {'zone2': model}
+    predictor._confidence = {'zone2': 0.8}
+    
+    batch = predictor.predict_speed_batch(rider, routes_df, 'zone2')
+    single = [predictor.predict_speed(rider, route, 'zone2')['speed_kmh'] for route in routes]
+    assert np.allclose(batch, single), f"Model batch {batch} != per-route {single}"
+    
+    print("✅ Batch speed predictions match per-route predictions")
+    return True
+
+def _local_storage_manager(data_dir):
+    """Build a StorageManager that only writes to the given local directory."""
+    from helper.storage.storage_manager import StorageManager
+    
+    manager = StorageManager()
+    manager.s3_backend = None
+    manager.local_data_dir = data_dir
+    manager._ensure_local_directories()
+    return manager
+
+def _activity_sample(activity_id, speed_kmh):
+    """Build an activity training sample shaped like _convert_activity_to_training_data output."""
+    return {
+        'features': [250, 75, 2, 220, 8, 70, 40.0, 400, 1.0, 1.5, speed_kmh],
+        'targets': {'actual_speed_kmh': speed_kmh, 'actual_time_hours': 40.0 / speed_kmh},
+        'metadata': {
+            'activity_id': activity_id,
+            'activity_name': f"Activity {activity_id}",
+            'start_date': '2024-05-01T07:00:00Z',
+            'source': 'strava_activity',
+            'created_at': '2024-05-02T00:00:00'
+        }
+    }
+
+def test_training_samples_store():
+    """Test the columnar training sample file round-trips and upserts by activity."""
+    import tempfile
+    from helper.ml.model_trainer import ModelTrainer
+    
+    with tempfile.TemporaryDirectory() as data_dir:
+        trainer = ModelTrainer()
+        trainer.storage_manager = _local_storage_manager(data_dir)
+        
+        assert trainer._load_training_samples_df('rider') is None, "Nothing should be stored yet"
+        assert trainer._store_training_samples('rider', [_activity_sample(1, 25.0), _activity_sample(2, 30.0)])
+        
+        samples_df = trainer._load_training_samples_df('rider')
+        assert len(samples_df) == 2, "Both samples should be stored"
+        assert str(samples_df['activity_id'].dtype) == 'int64', "Activity ids should be stored as int64"
+        assert str(samples_df['average_speed_kmh'].dtype) == 'float32', "Features should be stored as float32"
+        
+        # Re-storing an activity replaces its row instead of duplicating it
+        assert trainer._store_training_samples('rider', [_activity_sample(1, 27.5), _activity_sample(3, 32.0)])
+        samples_df = trainer._load_training_samples_df('rider')
+        assert sorted(samples_df['activity_id']) == [1, 2, 3], "Samples should be unique per activity"
+        speeds = dict(zip(samples_df['activity_id'], samples_df['actual_speed_kmh']))
+        assert speeds[1] == 27.5, "The latest sample for an activity should win"
+        
+        # Legacy per-activity JSON samples are collected alongside the columnar file
+        legacy = _activity_sample(4, 28.0)
+        trainer.storage_manager.save_data(legacy, 'rider', 'training_data', 'activity_4_training.json')
+        trainer.storage_manager.save_data({'note': 'ignored'}, 'rider', 'training_data', 'notes.json')
+        
+        training_data = trainer.collect_training_data('rider')
+        assert len(training_data['features']) == 4, "Expected three columnar and one legacy sample"
+        assert len(training_data['targets']['actual_speed_kmh']) == 4, "Every sample should have a speed target"
+        assert len(training_data['metadata']) == 4, "Every sample should have metadata"
+    
+    print("✅ Training sample store round-trip and upsert passed")
+    return True
+
 def main():
     """Run all ML tests."""
     print("🧪 Running KOMpass ML Tests...")
@@ -105,7 +205,9 @@ def main():
     tests = [
         ("ML Module Imports", test_ml_imports),
         ("Speed Prediction", test_speed_prediction),
-        ("Model Transparency", test_model_transparency)
+        ("Model Transparency", test_model_transparency),
+        ("Batch Speed Prediction", test_speed_prediction_batch),
+        ("Training Sample Store", test_training_samples_store)
     ]
     
     results = []
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Test script for KOMpass rider data processing.
+Tests background saves, validation, and feature engineering caches.
+"""
+
+import copy
+import io
+import math
+import os
+import sys
+import logging
+import tempfile
+import threading
+import time
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _local_storage_manager(data_dir):
+    """Build a StorageManager that only writes to the given local directory."""
+    from helper.storage.storage_manager import StorageManager
+    
+    manager = StorageManager()
+    manager.s3_backend = None
+    manager.local_data_dir = data_dir
+    manager._ensure_local_directories()
+    return manager
+
+
+def _sample_rider_data(num_activities=3):
+    """Build a small rider data payload with PII and activities."""
+    return {
+        'basic_info': {'id': 42, 'username': 'rider42', 'firstname': 'Jane', 'lastname': 'Doe',
+                       'email': 'jane@example.com', 'weight': 68.0},
+        'stats': {'all_ride_totals': {'count': 12, 'distance': 480000}},
+        'zones': {'heart_rate': {'zones': [{'min': 0, 'max': 140}]}},
+        'recent_activities': [
+            {'id': i, 'name': f"Ride {i}", 'type': 'Ride', 'distance': 30000.0 + 1000 * i,
+             'moving_time': 3600 + 60 * i, 'total_elevation_gain': 300.0 + 10 * i,
+             'average_speed': 8.0, 'start_date': f"2024-05-{i + 1:02d}T07:00:00Z",
+             'start_latlng': [51.5, -0.1]}
+            for i in range(num_activities)
+        ]
+    }
+
+
+class _RecordingHandler(logging.Handler):
+    """Collect log records emitted while a test runs."""
+    
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.records = []
+    
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_async_rider_data_save():
+    """Test background saves write PII-free data and surface failures in the log."""
+    print("Testing background rider data saves...")
+    
+    from helper.processing.rider_data import data_manager as data_manager_module
+    from helper.processing.rider_data.data_manager import RiderDataManager
+    
+    with tempfile.TemporaryDirectory() as data_dir:
+        manager = RiderDataManager()
+        manager.storage_manager = _local_storage_manager(data_dir)
+        
+        # Hold the background save until the caller has finished editing
+        edits_done = threading.Event()
+        remove_pii = manager.remove_pii_from_rider_data
+        
+        def gated_remove_pii(data, now_iso=None):
+            edits_done.wait(timeout=30)
+            return remove_pii(data, now_iso=now_iso)
+        
+        manager.remove_pii_from_rider_data = gated_remove_pii
+        rider_data = _sample_rider_data()
+        future = manager.save_rider_data_async(rider_data, 'rider42')
+        # The save works on a deep snapshot, so later edits at any depth don't race it
+        rider_data['recent_activities'][0]['start_latlng'] = [48.8, 2.3]
+        rider_data['recent_activities'][1]['distance'] = 1.0
+        rider_data['basic_info']['firstname'] = 'Changed'
+        rider_data['recent_activities'] = []
+        edits_done.set()
+        assert future.result(timeout=30) is True, "Background save should succeed"
+        manager.remove_pii_from_rider_data = remove_pii
+        
+        files = manager.storage_manager.list_user_data('rider42', 'rider_data', prefix='rider_data_rider42_')
+        assert len(files) == 1, "Expected one saved rider data file"
+        saved = manager.storage_manager.load_data('rider42', 'rider_data', files[0]['filename'])
+        assert saved['basic_info']['firstname'].startswith('User_'), "First name not anonymized"
+        assert 'email' not in saved['basic_info'], "Email not removed"
+        assert len(saved['recent_activities']) == 3, "Snapshot should keep the original activities"
+        assert 'start_latlng' not in saved['recent_activities'][0], "GPS coordinates not removed"
+        assert saved['recent_activities'][1]['distance'] == 31000.0, "Nested edit after submit leaked into the save"
+        expected_name = manager.remove_pii_from_rider_data(_sample_rider_data())['basic_info']['firstname']
+        assert saved['basic_info']['firstname'] == expected_name, "Name edit after submit leaked into the save"
+        
+        # Exceptions escaping the save are logged instead of vanishing into the future
+        def failing_save(data, user_id):
+            raise RuntimeError("disk full")
+        
+        manager.save_rider_data = failing_save
+        handler = _RecordingHandler()
+        data_manager_module.logger.addHandler(handler)
+        try:
+            future = manager.save_rider_data_async(_sample_rider_data(), 'rider42')
+            assert isinstance(future.exception(timeout=30), RuntimeError), "Expected the save error on the future"
+            # Done-callbacks run just after waiters are woken
+            deadline = time.time() + 5
+            while not handler.records and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            data_manager_module.logger.removeHandler(handler)
+        
+        messages = [record.getMessage() for record in handler.records]
+        assert any("disk full" in message for message in messages), f"Save failure not logged: {messages}"
+    
+    print("✓ Background rider data saves successful")
+    return True
+
+
+def test_concurrent_saves_bump_version():
+    """Test every concurrent save for a user gets its own latest-file cache version."""
+    print("\nTesting concurrent rider data save versions...")
+    
+    from helper.processing.rider_data import data_manager as data_manager_module
+    from helper.processing.rider_data.data_manager import RiderDataManager
+    
+    with tempfile.TemporaryDirectory() as data_dir:
+        manager = RiderDataManager()
+        manager.storage_manager = _local_storage_manager(data_dir)
+        
+        before = data_manager_module._rider_data_versions.get('rider43', 0)
+        futures = [manager.save_rider_data_async(_sample_rider_data(), 'rider43') for _ in range(16)]
+        assert all(future.result(timeout=30) for future in futures), "Every background save should succeed"
+        after = data_manager_module._rider_data_versions.get('rider43', 0)
+        assert after - before == 16, f"Expected 16 version bumps, got {after - before}"
+    
+    print("✓ Concurrent saves each bump the version")
+    return True
+
+
+def test_validation_sees_in_place_edits():
+    """Test re-validating a rider data dict reflects nested in-place edits."""
+    print("\nTesting rider data validation after in-place edits...")
+    
+    from helper.processing.rider_data.data_manager import RiderDataManager
+    
+    manager = RiderDataManager()
+    rider_data = _sample_rider_data()
+    rider_data["fitness_metrics"] = {}
+    
+    first = manager.validate_rider_data(rider_data)
+    assert "No power data available in activities" in first["data_quality_issues"], "Expected missing power issue"
+    
+    # Edit an existing activity and fill a processed section without replacing any top-level value
+    rider_data["recent_activities"][0]["average_watts"] = 210.0
+    rider_data["fitness_metrics"]["activity_frequency"] = 3.5
+    
+    second = manager.validate_rider_data(rider_data)
+    assert "No power data available in activities" not in second["data_quality_issues"], "Power edit not seen"
+    assert second["completeness_score"] > first["completeness_score"], "Completeness should reflect the new section"
+    
+    # Edits to a returned result don't leak into later validations
+    second["data_quality_issues"].append("caller note")
+    third = manager.validate_rider_data(rider_data)
+    assert "caller note" not in third["data_quality_issues"], "Validation results should not be shared"
+    
+    # validated_data aliases the input unless a copy is requested
+    assert third["validated_data"] is rider_data, "Expected the caller's dict by default"
+    copied = manager.validate_rider_data(rider_data, copy=True)["validated_data"]
+    assert copied is not rider_data and copied == rider_data, "Expected a shallow copy with copy=True"
+    
+    print("✓ Validation reflects in-place edits")
+    return True
+
+
+def test_vo2_max_power_record_durations():
+    """Test odd power record durations are skipped instead of failing the fitness analysis."""
+    print("\nTesting VO2 max estimation from power records...")
+    
+    from helper.processing.rider_data.fitness_analyzer import FitnessMetricsAnalyzer
+    
+    analyzer = FitnessMetricsAnalyzer()
+    records = [
+        {'duration': '20m', 'value': 400},
+        {'duration': None, 'value': 390},
+        {'duration': [1200], 'value': 380},
+        {'duration': '1200.0', 'value': 300}
+    ]
+    stats = {'all_ride_totals': {'count': 12}, 'biggest_ride_distance': {'power': records}}
+    
+    vo2 = analyzer.estimate_vo2_max(stats, [])
+    assert vo2['method'] == '20-minute power', "Expected the numeric 20-minute record to be used"
+    assert abs(vo2['estimated_vo2_max'] - (10.8 * 300 / 75 + 7)) < 1e-9, "Wrong record used for VO2 max"
+    
+    results = analyzer.analyze_all(_sample_rider_data()['recent_activities'], stats, None)
+    assert results['vo2_analysis']['method'] == '20-minute power', "Fitness analysis should survive odd durations"
+    
+    print("✓ Odd power record durations are skipped")
+    return True
+
+
+def _avoid_minute_rollover():
+    """Wait out the end of a minute so time-bucketed cache entries don't expire mid-test."""
+    if time.time() % 60 > 55:
+        time.sleep(61 - time.time() % 60)
+
+
+def _count_calls(obj, method_name):
+    """Wrap a bound method on obj and return the list its calls are recorded in."""
+    calls = []
+    original = getattr(obj, method_name)
+    
+    def counting(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+    
+    setattr(obj, method_name, counting)
+    return calls
+
+
+def test_feature_cache():
+    """Test feature results are cached by content and never aliased to callers."""
+    print("\nTesting feature engineering result cache...")
+    
+    from helper.processing.rider_data.feature_engineer import FeatureEngineer
+    
+    engineer = FeatureEngineer()
+    engineer.storage_manager = None
+    extractions = _count_calls(engineer, "_extract_basic_features")
+    rider_data = _sample_rider_data(8)
+    _avoid_minute_rollover()
+    
+    first = engineer.get_feature_engineering_data(rider_data)
+    assert first["total_features"] > 0, "Expected features to be extracted"
+    
+    # Identical content in a different dict is a cache hit
+    second = engineer.get_feature_engineering_data(copy.deepcopy(rider_data))
+    assert len(extractions) == 1, "Identical content should be served from the cache"
+    assert second == first, "Cached result should match the original"
+    
+    # Modifying a returned result must not change what the cache serves next
+    second["performance_features"]["max_distance"] = -1.0
+    second["composite_scores"].clear()
+    second["total_features"] = 0
+    third = engineer.get_feature_engineering_data(rider_data)
+    assert len(extractions) == 1, "Expected another cache hit"
+    assert third == first, "Caller edits leaked into the cached result"
+    
+    # A nested in-place change is a different payload and is recomputed
+    rider_data["recent_activities"][0]["distance"] = 99999.0
+    fourth = engineer.get_feature_engineering_data(rider_data)
+    assert len(extractions) == 2, "Nested change should miss the cache"
+    assert fourth["performance_features"]["max_distance"] == 99999.0, "Recomputed features should see the change"
+    
+    print("✓ Feature cache hits, misses and copies correctly")
+    return True
+
+
+def _same_features(first, second):
+    """Compare two features dicts value by value, treating NaN as equal to NaN."""
+    def flat(features):
+        # Recomputed results carry their own extraction time
+        return {
+            (key, name): value
+            for key, values in features.items() if key != "feature_extraction_timestamp"
+            for name, value in (values.items() if isinstance(values, dict) else [(None, values)])
+        }
+    
+    first, second = flat(first), flat(second)
+    if first.keys() != second.keys():
+        return False
+    return all(
+        a == b or (isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b))
+        for a, b in ((first[key], second[key]) for key in first)
+    )
+
+
+def test_feature_store():
+    """Test persisted feature results round-trip, reject bad files, and are pruned per rider."""
+    print("\nTesting persisted feature store...")
+    
+    import pandas as pd
+    from helper.processing.rider_data.feature_engineer import FeatureEngineer
+    
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = _local_storage_manager(data_dir)
+        
+        def engineer_with_store():
+            # A fresh engineer has an empty in-memory cache, so hits come from storage
+            engineer = FeatureEngineer()
+            engineer.storage_manager = storage
+            return engineer, _count_calls(engineer, "_extract_basic_features")
+        
+        def stored_files():
+            return storage.list_user_data('42', 'features', prefix='features_42_')
+        
+        rider_data = _sample_rider_data(8)
+        engineer, _ = engineer_with_store()
+        first = engineer.get_feature_engineering_data(rider_data)
+        assert len(stored_files()) == 1, "Expected the result to be persisted"
+        
+        # Round trip: a new engineer loads the stored result instead of extracting
+        engineer, extractions = engineer_with_store()
+        loaded = engineer.get_feature_engineering_data(copy.deepcopy(rider_data))
+        assert not extractions, "Stored result should be used"
+        assert _same_features(loaded, first), "Stored result should match the original"
+        assert loaded["feature_extraction_timestamp"] == first["feature_extraction_timestamp"], "Timestamp not stored"
+        
+        # A file with an unexpected layout is ignored, recomputed and overwritten
+        buffer = io.BytesIO()
+        pd.DataFrame([{'unrelated': 1}]).to_parquet(buffer, index=False)
+        storage.save_data(buffer.getvalue(), '42', 'features', stored_files()[0]['filename'])
+        engineer, extractions = engineer_with_store()
+        recomputed = engineer.get_feature_engineering_data(copy.deepcopy(rider_data))
+        assert len(extractions) == 1, "Mismatched stored file should be recomputed"
+        assert _same_features(recomputed, first), "Recomputed result should match the original"
+        engineer, extractions = engineer_with_store()
+        engineer.get_feature_engineering_data(copy.deepcopy(rider_data))
+        assert not extractions, "Recomputed result should have replaced the bad file"
+        
+        # Changed content never reuses the stored result for the old content
+        rider_data["recent_activities"][0]["distance"] = 99999.0
+        engineer, extractions = engineer_with_store()
+        changed = engineer.get_feature_engineering_data(rider_data)
+        assert len(extractions) == 1, "Changed content should not hit the stored result"
+        assert changed["performance_features"]["max_distance"] == 99999.0, "Stale features served"
+        
+        # Only the five most recent results are kept per rider
+        for distance in range(100000, 100006):
+            time.sleep(0.01)
+            rider_data["recent_activities"][0]["distance"] = float(distance)
+            engineer, _ = engineer_with_store()
+            engineer.get_feature_engineering_data(rider_data)
+        files = stored_files()
+        assert len(files) == 5, f"Expected 5 stored results, found {len(files)}"
+        
+        # The newest result survives pruning
+        engineer, extractions = engineer_with_store()
+        engineer.get_feature_engineering_data(rider_data)
+        assert not extractions, "Latest result should still be stored"
+    
+    print("✓ Feature store round-trip, validation and pruning successful")
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("KOMpass Rider Data Test Suite")
+    print("=" * 40)
+    
+    tests = [
+        test_async_rider_data_save,
+        test_concurrent_saves_bump_version,
+        test_validation_sees_in_place_edits,
+        test_vo2_max_power_record_durations,
+        test_feature_cache,
+        test_feature_store,
+    ]
+    
+    results = []
+    for test in tests:
+        try:
+            results.append(test())
+        except AssertionError as e:
+            print(f"✗ {test.__name__} failed: {e}")
+            results.append(False)
+    
+    passed = sum(results)
+    total = len(results)
+    print("\n" + "=" * 40)
+    if passed == total:
+        print(f"ALL TESTS PASSED: {passed}/{total} ✓")
+        return 0
+    print(f"TESTS FAILED: {passed}/{total} ✗")
+    return 1
+
+
+if __name__ == "__main__":
+    exit(main())